@@ -5,25 +5,40 @@ Jason Mahr
 
 
 from constants import *
+from costs import MODELS
 from cube import Cube
+from finisher import finish as finish_phases
 from fitness import fitness
-from random import random
-from time import clock
+from macros import segment
+from optimize import shorten_ids
+from ranking import rank
+from state import flatten
+from streams import DEFAULT, Mutations
+from time import clock, time as now
 
 
-def mutate(cube, phase):
-    """Mutates a cube given the current phase."""
+def mutate(cube, phase, mutations, table=None):
+    """Mutates a cube given the current phase, taking its random moves
+    from `mutations`. Returns whether the cube had to be rescored. The
+    size in the fitness score is the cost in `table`, a cost model's
+    scores, if given.
+    """
 
     # Conduct a random number of random moves
-    num_moves = int(random() * (MAX_NUM_MOVES[phase] + 1))
-    for _ in range(num_moves):
-        move_index = int(random() * NUM_MOVE_CHOICES[phase])
-        cube.move(MOVE_CHOICES[phase][move_index])
+    for move in mutations(phase):
+        cube.move(move)
+
+    # Unchanged cubes keep their fitness and fitness score
+    if not cube.is_dirty():
+        return False
 
     # Update cube's fitness and fitness score
     fit = fitness[phase](cube)
     cube.set_fitness(fit)
-    cube.set_fitness_score(FITNESS_WEIGHT * fit + SIZE_WEIGHT * cube.size())
+    cube.set_fitness_score(FITNESS_WEIGHT * fit +
+                           SIZE_WEIGHT * cube.size(table))
+    cube.set_dirty(False)
+    return True
 
 
 def create_population(cube):
@@ -39,12 +54,26 @@ def reset_population(population, cube):
     """Resets a population based on a cube, used for local optima."""
     for i in range(POP_SIZE):
         population[i].copy(cube)
+        population[i].set_dirty()
+
+
+def dirty_population(population):
+    """Marks every cube for rescoring, used when the phase (and thus
+    the fitness function) changes.
+    """
+    for cube in population:
+        cube.set_dirty()
 
 
-def next_generation(population, phase, selector):
-    """Mutates all cubes then selects based on fitness_score."""
+def next_generation(population, phase, selector, mutations, table=None):
+    """Mutates all cubes then selects based on fitness_score. Returns
+    whether to go to the next phase and the fraction of cubes whose
+    evaluation was skipped because they were unchanged.
+    """
+    evaluations = 0
     for cube in population:
-        mutate(cube, phase)
+        evaluations += mutate(cube, phase, mutations, table)
+    skipped = 1 - float(evaluations) / POP_SIZE
     population.sort(key=lambda cube: cube.fitness_score)
 
     # Go to next phase if all survivors have solved the current phase
@@ -56,20 +85,126 @@ def next_generation(population, phase, selector):
     
     # Update population (unless algorithm is done) and return
     if not (phase == NUM_PHASES - 1 and go_to_next_phase):
-        for i in range(NUM_SURVIVORS, POP_SIZE):
-            population[i].copy(population[selector()])
-    return go_to_next_phase
+        parents = selector.parents(population)
+        for i, parent in enumerate(parents, NUM_SURVIVORS):
+            population[i].copy(population[parent])
+    return go_to_next_phase, skipped
+
+
+def complete_solutions(population, top, finishing, shorten, phase,
+                       stop=None):
+    """Returns distinct complete solutions from the survivors of a
+    finished solve, in population order, up to CANDIDATES_PER_SOLUTION
+    for each of the `top` wanted. If the solve finished by search (with
+    `finishing`), each survivor that got as far as FINISHER_PHASE is
+    finished the same way. No more survivors are tried once the time
+    `stop` has passed.
+    """
+    solutions, histories, seen = [], set(), set()
+    if phase < NUM_PHASES:
+        return solutions
+    for cube in population[:NUM_SURVIVORS]:
+        if stop is not None and now() >= stop:
+            break
+        history = cube.get_moves()
+        if tuple(history) in histories:
+            continue
+        histories.add(tuple(history))
+        if finishing is not None:
+            if settle(cube, 0)[0] < FINISHER_PHASE:
+                continue
+            moves = finish_phases(flatten(cube))
+            if moves is None:
+                continue
+            history += moves
+        elif cube.get_fitness():
+            continue
+        if shorten:
+            history = shorten_ids(history)
+        if tuple(history) not in seen:
+            seen.add(tuple(history))
+            solutions.append(history)
+            if len(solutions) == top * CANDIDATES_PER_SOLUTION:
+                break
+    return solutions
+
+
+def settle(cube, phase):
+    """Returns how many phases a cube completes, checking from `phase`
+    on, and what remains of the first phase it does not complete.
+    """
+    fit = 0
+    while phase < NUM_PHASES:
+        fit = fitness[phase](cube)
+        if fit:
+            break
+        phase += 1
+    return phase, fit
 
 
-def solve(cube, selector, mailbox):
+def quiet(*progress):
+    """A mailbox that ignores progress updates."""
+    pass
+
+
+def solve(cube, selector, mailbox, deadline=None, rng=DEFAULT, cancel=None,
+          shorten=SHORTEN_SOLUTIONS, library=None, finish=USE_FINISHER,
+          top=0, by='length', model=None):
     """Solves a cube using the given selector. Sends progress updates to
-    the provided mailbox, a callback function.
+    the provided mailbox, a callback function, which also receives the
+    fraction of evaluations skipped in each generation.
+
+    If `deadline` is given, the solve stops after that many seconds of
+    wall time and returns the best partial result so far. Either way the
+    result is (time, generations, solution, phase, fitness), where the
+    solution is a list of move ids (see history.format_moves), `phase` is
+    the number of phases the solution completes and `fitness` is what
+    remains of the current phase, both for the best cube. A finished
+    solve has `phase` equal to NUM_PHASES and `fitness` 0. If a reset
+    lost the furthest phase reached, the partial result is the best cube
+    that got there. A partial solution can be finished by applying it to
+    the cube and solving from there.
+
+    Mutations draw from `rng`. Passing a seeded RNG (and a selector
+    seeded from a separate stream) makes the run reproducible.
+
+    `cancel`, if given, is checked after every generation like the
+    deadline. It is any object with an is_set method, such as a
+    threading.Event set from another thread.
+
+    If `shorten` is set, the solution is post-optimized with
+    optimize.shorten_ids before it is returned. The time reported
+    includes the optimization.
+
+    `library`, a macros.Library, lets mutations apply macros recorded in
+    earlier solves, and records the moves with which the best cube
+    completes each phase. Saving the library is up to the caller.
+
+    If `finish` is set, the phases from FINISHER_PHASE on are not evolved
+    but solved exactly by finisher.finish, as soon as the best cube
+    reaches them. A partial result that got that far is finished the
+    same way. If the search fails, the genetic algorithm carries on.
+
+    If `top` is positive, the result has a sixth element: up to `top`
+    distinct complete solutions from the final generation, ranked `by`
+    'length' or 'cost' (see ranking.py). They are drawn from the sorted
+    survivors, so a partial result has none.
+
+    `model`, a costs.CostModel, replaces the number of moves in fitness
+    scores with their cost, scaled to 1 per move on average, and is the
+    cost used in ranking.
     """
 
     # Instantiate variables and start clock
     generations, resets, phase = 0, 0, 0
     population = create_population(cube)
     start = clock()
+    stop = None if deadline is None else now() + deadline
+    mutations = Mutations(rng, library)
+    phase_starts = [[]]
+    finishing = None
+    table = None if model is None else model.scores
+    furthest, furthest_phase = Cube(), 0
 
     # While algorithm is not complete
     while phase < NUM_PHASES:
@@ -79,20 +214,65 @@ def solve(cube, selector, mailbox):
             reset_population(population, cube)
             generations = 1
             phase = 0
+            phase_starts = [[]]
             resets += 1
 
         # Populate next generation
-        go_to_next_phase = next_generation(population, phase, selector)
+        go_to_next_phase, skipped = next_generation(population, phase,
+                                                    selector, mutations,
+                                                    table)
 
         # Phase for the user should be 1-indexed instead of 0-indexed.
         mailbox(generations, phase + 1, population[NUM_SURVIVORS-1].fitness,
-                clock() - start)
+                clock() - start, skipped)
 
         if go_to_next_phase:
+            if library is not None:
+                # Moves of the best cube since the phase started
+                history = population[0].get_moves()
+                library.record(phase, segment(phase_starts, history))
+                phase_starts = [survivor.get_moves()
+                                for survivor in population[:NUM_SURVIVORS]]
             phase += 1
+            if phase > furthest_phase:
+                furthest.copy(population[0])
+                furthest_phase = phase
+            dirty_population(population)
+            if finish and phase == FINISHER_PHASE:
+                finishing = finish_phases(flatten(population[0]))
+                if finishing is not None:
+                    break
+
+        # Out of time or cancelled: settle for the best cube so far
+        if stop is not None and now() >= stop:
+            break
+        if cancel is not None and cancel.is_set():
+            break
     
+    # Score the best cube, or the furthest if a reset lost its phase,
+    # and finish by search if it got far enough
+    best, fit = population[0], 0
+    if finishing is None:
+        phase, fit = settle(best, phase)
+        if phase < furthest_phase:
+            best = furthest
+            phase, fit = settle(best, furthest_phase)
+        if finish and FINISHER_PHASE <= phase < NUM_PHASES:
+            finishing = finish_phases(flatten(best))
+    solution = best.get_moves()
+    if finishing is not None:
+        solution += finishing
+        phase, fit = NUM_PHASES, 0
+
     # Clean up and return
-    time = clock() - start
     generations += resets * MAX_PHASE_2_GENERATIONS_BEFORE_RESET
-    solution = population[0].get_history()
-    return (time, generations, solution)
+    if shorten:
+        solution = shorten_ids(solution)
+    if top:
+        solutions = complete_solutions(population, top, finishing, shorten,
+                                       phase, stop)
+        solutions = rank(solutions, by, model or MODELS['turns'])[:top]
+    time = clock() - start
+    if top:
+        return (time, generations, solution, phase, fit, solutions)
+    return (time, generations, solution, phase, fit)
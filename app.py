@@ -4,13 +4,15 @@ Jason Mahr
 """
 
 
-from algorithm import solve
+from bisect import bisect_right
 from constants import *
 from cube import Cube
+from history import format_moves
+from progress import Task
 from random import random
 from selectors import Geometric, Rank
 import Tkinter as tk
-from validate import is_solved, is_valid
+from validate import diagnose, is_solved
 
 
 def normal(scale=1):
@@ -46,8 +48,9 @@ class Error:
     def off(self):
         self.text.set('')
 
-    def invalid(self):
-        self.text.set(TAB + TAB + 'Invalid cube! Verify your colors.')
+    def invalid(self, validation):
+        """Names the failing check and the pieces involved."""
+        self.text.set(TAB + TAB + 'Invalid cube! ' + validation.detail)
 
     def solved(self):
         self.text.set(TAB + TAB + 'Nothing to do! Try using Scramble.')
@@ -56,6 +59,15 @@ class Error:
         self.label.destroy()
         
 
+def slot(pixel):
+    """Returns the index into ADDR of the slot containing a pixel
+    coordinate, or None if the pixel is in a margin or a gap.
+    """
+    i = bisect_right(ADDR_STARTS, pixel) - 1
+    if i >= 0 and pixel <= ADDR[i][1]:
+        return i
+
+
 class Net:
     """A cube net. This is what the user uses to input their Rubik's
     Cube. In popular usage, a cube net is a 2D shape that folds into a
@@ -74,18 +86,32 @@ class Net:
 
         # Holds a pointer to the error to be able to dismiss messages
         self.error = error
-        self.canvas = None
-        self.refresh()
 
-    def refresh(self):
-        """Creates a new canvas to reflect an updated cube."""
-        self.destroy()
+        # The canvas and its items are created once, then recolored
         self.new()
         self.draw()
 
+    def refresh(self):
+        """Recolors the tiles and panel to reflect an updated cube."""
+        for side in range(6):
+            self.refresh_tile(side)
+            for index in range(8):
+                self.refresh_tile((side, index))
+
+    def refresh_tile(self, tile):
+        """Recolors a single tile, or the outline of a panel tile if
+        given a side.
+        """
+        if tile in range(6):
+            line = EMPH if self.selected_color == tile else BKGD
+            self.canvas.itemconfig(self.panel[tile], outline=line)
+        else:
+            (side, index) = tile
+            c = self.center_colors[self.cube.get(tile)]
+            self.canvas.itemconfig(self.tiles[side][index], fill=c)
+
     def destroy(self):
-        if self.canvas:
-            self.canvas.destroy()
+        self.canvas.destroy()
     
     def new(self):
         self.canvas = tk.Canvas(self.master, width=WIDTH, height=HEIGHT)
@@ -93,7 +119,11 @@ class Net:
         self.canvas.grid(row=self.row, column=self.column, columnspan=self.cs)
 
     def draw(self):
-        """Draws all tiles, including center and panel tiles."""
+        """Draws all tiles, including center and panel tiles, keeping the
+        ids of the ones that change.
+        """
+        self.panel = [None] * 6
+        self.tiles = [[None] * 8 for side in range(6)]
         for side in range(6):
             
             # Get the color associated with the side
@@ -106,39 +136,43 @@ class Net:
             # Draw this side's tile in the panel
             ((x1, x2), (y1, y2)) = PANEL[side]
             line = EMPH if self.selected_color == side else BKGD
-            self.canvas.create_rectangle(x1, y1, x2, y2, fill=c, outline=line)
+            self.panel[side] = self.canvas.create_rectangle(x1, y1, x2, y2,
+                                                            fill=c,
+                                                            outline=line)
 
             # Draw this side's label
             (x, y) = LABEL_XY[side]
-            font = normal(1.8) if self.selected_color == side else normal(1.8)
-            self.canvas.create_text(x, y, text=LABEL[side], fill=c, font=font)
+            self.canvas.create_text(x, y, text=LABEL[side], fill=c,
+                                    font=normal(1.8))
 
             # Draw this side's tiles around the center tile
             for index in range(8):
                 ((x1, x2), (y1, y2)) = TILES[side][index]
                 c = self.center_colors[self.cube.get((side, index))]
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=c,
-                                             outline=BKGD)
+                self.tiles[side][index] = self.canvas.create_rectangle(
+                    x1, y1, x2, y2, fill=c, outline=BKGD)
 
     def update(self, event):
-        """Handles a mouse click and edits the cube as appropriate."""
+        """Handles a mouse click and edits the cube as appropriate. The
+        click is mapped to a slot of the grid by binary search over ADDR,
+        and the slot to a tile by a lookup in SLOTS.
+        """
 
         # Turn off errors, if they exist, after the user interacts
         self.error.off()
-        for side in range(6):
-            
+        tile = SLOTS.get((slot(event.x), slot(event.y)))
+        if tile is None:
+            return
+        if tile in range(6):
+
             # If a panel tile was clicked, update `self.selected_color`
-            ((x1, x2), (y1, y2)) = PANEL[side]
-            if x1 <= event.x <= x2 and y1 <= event.y <= y2:
-                self.selected_color = side
-                return self.refresh()
+            previous, self.selected_color = self.selected_color, tile
+            self.refresh_tile(previous)
+        else:
 
             # If a tile was clicked, update its color
-            for index in range(8):
-                ((x1, x2), (y1, y2)) = TILES[side][index]
-                if x1 <= event.x <= x2 and y1 <= event.y <= y2:
-                    self.cube.set((side, index), self.selected_color)
-                    return self.refresh()
+            self.cube.set(tile, self.selected_color)
+        self.refresh_tile(tile)
 
     def reset(self):
         """Reset functionality."""
@@ -154,8 +188,9 @@ class Net:
 
     def get_cube(self):
         """If cube is ready, output for solving and destroy canvas."""
-        if not is_valid(self.cube):
-            return self.error.invalid()
+        validation = diagnose(self.cube.get_cube())
+        if not validation:
+            return self.error.invalid(validation)
         if is_solved(self.cube):
             return self.error.solved()
         self.error.destroy()
@@ -354,38 +389,61 @@ class Application(tk.Frame):
         self.n3 = tk.Label(self, textvariable=n3, font=normal(1.2))
         self.n3.grid(row=self.rows(1), column=0, columnspan=FULL, sticky=tk.W)
 
-        self.master.update()
+        # Solve cube on a background thread, which can be cancelled
+        task = Task(cube, self.selector, interval=1. / FRAME_RATE)
+        self.stop = tk.Button(self, text='Cancel', command=task.cancel)
+        self.stop.grid(row=self.rows(1), column=1, sticky=tk.W)
+        self.after(1000 // FRAME_RATE, self.poll, task, n3)
 
-        # Mailbox for updating algorithm status
-        def mailbox(generations, phase, fitness, time):
+
+    def poll(self, task, n3):
+        """Shows the latest progress of a solve, FRAME_RATE times a
+        second, until the solve is done. The UI stays responsive and the
+        solver never waits for a redraw.
+        """
+        events = task.poll()
+        if events:
+            event = events[-1]
             status = (('Generation {}: We are on phase {} of 7 with fitness '
-                       + 'of {}. Time: {} s.').format(generations, phase,
-                       fitness, round(time, 1)))
+                       + 'of {}. Time: {} s. Skipped: {}%.').format(
+                       event.generation, event.phase, event.fitness,
+                       round(event.elapsed, 1), int(event.skipped * 100)))
             n3.set(TAB + status)
-            self.master.update()
-        
-        # Solve cube
-        solution = solve(cube, self.selector, mailbox)
+        if not task.done():
+            self.after(1000 // FRAME_RATE, self.poll, task, n3)
+            return
+        self.stop.destroy()
+        self.show(task.result(), task.cancelled.is_set(), n3)
+
+
+    def show(self, solution, cancelled, n3):
+        """Shows a finished or cancelled solve."""
 
         # Print status
         solution_len = len(solution[2])
         first = int(solution_len * 0.38)
         second = int(solution_len * 0.7)
-        status = (('A solution was found in {} generations! It took {} '
-                   + 'seconds and contains {} moves:').format(
-                   solution[1], round(solution[0], 1), solution_len))
+        if cancelled and solution[3] < NUM_PHASES:
+            status = (('Cancelled after {} generations. The best cube '
+                       + 'completes {} of 7 phases with {} moves:').format(
+                       solution[1], solution[3], solution_len))
+        else:
+            status = (('A solution was found in {} generations! It took {} '
+                       + 'seconds and contains {} moves:').format(
+                       solution[1], round(solution[0], 1), solution_len))
         n3.set(TAB + status)
 
 
         """End of Thistlethwaite is all half turns, which take up two
         characters each, so divide the string unevenly.
         """
-        moves1 = TAB + TAB + ' '.join(solution[2][:first])
-        moves2 = TAB + TAB + ' '.join(solution[2][first:second])
-        moves3 = TAB + TAB + ' '.join(solution[2][second:])
+        moves1 = TAB + TAB + format_moves(solution[2][:first])
+        moves2 = TAB + TAB + format_moves(solution[2][first:second])
+        moves3 = TAB + TAB + format_moves(solution[2][second:])
 
+        # The first line of moves takes the place of the Cancel button
         self.m1 = tk.Label(self, text=moves1, font=normal(1.2))
-        self.m1.grid(row=self.rows(1), column=0, columnspan=FULL, sticky=tk.W)
+        self.m1.grid(row=self.rows(0), column=0, columnspan=FULL, sticky=tk.W)
 
         self.m2 = tk.Label(self, text=moves2, font=normal(1.2))
         self.m2.grid(row=self.rows(1), column=0, columnspan=FULL, sticky=tk.W)
@@ -396,7 +454,6 @@ class Application(tk.Frame):
         # Exit button
         self.exit_btn = tk.Button(self, text='Exit', command=self.quit)
         self.exit_btn.grid(row=self.rows(1), column=1, sticky=tk.W)
-        self.master.update()
 
 
 # Run app
@@ -0,0 +1,159 @@
+"""Headless batch solving from the command line.
+
+Generate a corpus:  python batch.py generate --count N --seed S > FILE
+Solve a corpus:     python batch.py solve [FILE] --workers W [--macros]
+
+`generate` writes one scramble per line in MOVES notation. `solve` reads
+scrambles the same way, from FILE or from stdin, solves them in W worker
+processes and streams one JSON object per scramble to stdout, in input
+order, as soon as it is solved.
+
+With --macros, solves apply the macros saved in MACROS_FILE (see
+macros.py). With a single worker, they also record new macros, which are
+saved when the corpus is done.
+
+With --top K, each result also lists up to K distinct solutions from
+the final generation, ranked --by length or cost (see ranking.py).
+With --costs MODEL, fitness scores and ranking use that cost model (see
+costs.py) instead of counting moves.
+
+With --cache, scrambles are looked up in the solution cache (see
+cache.py) before solving, and complete solutions are added to it.
+
+Jason Mahr
+"""
+
+
+from algorithm import quiet, solve
+from argparse import ArgumentParser, FileType
+from cache import Cache
+from constants import NUM_PHASES
+from costs import MODELS
+from corpus import format_scramble, parse, scrambled, scrambles
+from history import format_moves
+from itertools import imap
+from json import dumps
+from macros import Library
+from multiprocessing import Pool
+from selectors import SELECTORS
+from streams import stream
+import sys
+from time import time
+
+
+"""The macro library and cache of this process, opened on first use."""
+LIBRARY = []
+CACHE = []
+
+
+def get_library():
+    if not LIBRARY:
+        LIBRARY.append(Library.load())
+    return LIBRARY[0]
+
+
+def get_cache():
+    if not CACHE:
+        CACHE.append(Cache())
+    return CACHE[0]
+
+
+def solve_line((index, line, name, seed, deadline, macros, cached, top,
+                by, costs)):
+    """Solves the scramble on one input line and returns the JSON-ready
+    result. Line i always uses streams 2i and 2i + 1 of the seed, for the
+    selector and the mutations, so results do not depend on the number
+    of workers (unless macros are being learned).
+    """
+    result = {'line': index}
+    try:
+        scramble = parse(line)
+    except ValueError as error:
+        result['error'] = str(error)
+        return result
+    selector = SELECTORS[name](stream(seed, 2 * index))
+    rng = stream(seed, 2 * index + 1)
+    start = time()
+    cube = scrambled(scramble)
+    if cached:
+        solution = get_cache().get(cube)
+        if solution is not None:
+            result.update({'scramble': format_scramble(scramble),
+                           'solution': format_moves(solution),
+                           'length': len(solution), 'time': 0,
+                           'wall_time': time() - start, 'generations': 0,
+                           'solved': True, 'cached': True})
+            if top:
+                result['solutions'] = [format_moves(solution)]
+            return result
+    library = get_library() if macros else None
+    solution = solve(cube, selector, quiet, deadline, rng,
+                     library=library, top=top, by=by,
+                     model=MODELS.get(costs))
+    if cached and solution[3] == NUM_PHASES:
+        get_cache().put(cube, solution[2])
+    result.update({'scramble': format_scramble(scramble),
+                   'solution': format_moves(solution[2]),
+                   'length': len(solution[2]), 'time': solution[0],
+                   'wall_time': time() - start, 'generations': solution[1],
+                   'solved': solution[3] == NUM_PHASES})
+    if top:
+        result['solutions'] = map(format_moves, solution[5])
+    return result
+
+
+def generate(args):
+    for scramble in scrambles(args.count, args.seed):
+        print format_scramble(scramble)
+
+
+def solve_all(args):
+    jobs = ((index, line, args.selector, args.seed, args.deadline,
+             args.macros, args.cache, args.top, args.by, args.costs)
+            for index, line in enumerate(args.file) if line.strip())
+    if args.workers > 1:
+        results = Pool(args.workers).imap(solve_line, jobs)
+    else:
+        results = imap(solve_line, jobs)
+    for result in results:
+        print dumps(result, sort_keys=True)
+        sys.stdout.flush()
+    if args.macros and args.workers <= 1:
+        get_library().save()
+
+
+def main():
+    parser = ArgumentParser(description='Generate and solve scrambles.')
+    commands = parser.add_subparsers()
+
+    generator = commands.add_parser('generate', help='write a corpus')
+    generator.add_argument('--count', type=int, default=200)
+    generator.add_argument('--seed', type=int, default=0)
+    generator.set_defaults(command=generate)
+
+    solver = commands.add_parser('solve', help='solve scrambles')
+    solver.add_argument('file', nargs='?', type=FileType('r'),
+                        default=sys.stdin, help='scrambles (default: stdin)')
+    solver.add_argument('--workers', type=int, default=1)
+    solver.add_argument('--selector', choices=sorted(SELECTORS),
+                        default='geometric')
+    solver.add_argument('--seed', type=int, default=0)
+    solver.add_argument('--deadline', type=float, default=None,
+                        help='seconds allowed per scramble')
+    solver.add_argument('--macros', action='store_true',
+                        help='apply and learn macro moves')
+    solver.add_argument('--cache', action='store_true',
+                        help='reuse and store solutions in the cache')
+    solver.add_argument('--top', type=int, default=0,
+                        help='also list this many ranked solutions')
+    solver.add_argument('--by', choices=('length', 'cost'), default='length')
+    solver.add_argument('--costs', choices=sorted(MODELS), default=None,
+                        help='cost model for scoring and ranking')
+    solver.set_defaults(command=solve_all)
+
+    args = parser.parse_args()
+    args.command(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Benchmarks selectors by solving a fixed corpus of seeded scrambles.
+
+Run: python benchmark.py [--count N] [--seed S] [--selectors NAME ...]
+                         [--costs MODEL] [--out FILE]
+
+Every selector solves the same scrambles with the same RNG streams, so
+differences in the results come from the selectors (or from whatever
+constants were changed between runs), not from luck. The median and 95th
+percentile of time, generations and solution length are printed, and
+every run is written to a JSON file. With --costs, fitness scores use
+that cost model (see costs.py) instead of counting moves.
+
+Jason Mahr
+"""
+
+
+from algorithm import quiet, solve
+from argparse import ArgumentParser
+from corpus import scrambled, scrambles
+from costs import MODELS
+from json import dump
+from math import ceil
+from selectors import SELECTORS
+from streams import stream
+
+
+METRICS = ('time', 'generations', 'length')
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    values = sorted(values)
+    rank = max(int(ceil(fraction * len(values))), 1)
+    return values[rank - 1]
+
+
+def run(name, corpus, seed, model=None):
+    """Solves every scramble in the corpus with the named selector.
+    Scramble i always uses stream 2i of the seed for the selector and
+    stream 2i + 1 for the mutations, so that selectors drawing different
+    amounts of random numbers still see the same mutations.
+    """
+    runs = []
+    for i, scramble in enumerate(corpus):
+        selector = SELECTORS[name](stream(seed, 2 * i))
+        time, generations, solution = solve(scrambled(scramble), selector,
+                                            quiet,
+                                            rng=stream(seed, 2 * i + 1),
+                                            model=model)[:3]
+        runs.append({'scramble': i, 'time': time, 'generations': generations,
+                     'length': len(solution)})
+    return runs
+
+
+def summarize(runs):
+    """Median and 95th percentile of each metric."""
+    summary = {}
+    for metric in METRICS:
+        values = [result[metric] for result in runs]
+        summary[metric] = {'median': percentile(values, 0.5),
+                           'p95': percentile(values, 0.95)}
+    return summary
+
+
+def main():
+    parser = ArgumentParser(description='Benchmark selectors.')
+    parser.add_argument('--count', type=int, default=20,
+                        help='number of scrambles in the corpus')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed for the corpus and the solver streams')
+    parser.add_argument('--selectors', nargs='+', choices=sorted(SELECTORS),
+                        default=sorted(SELECTORS))
+    parser.add_argument('--costs', choices=sorted(MODELS), default=None,
+                        help='cost model for the fitness scores')
+    parser.add_argument('--out', default='benchmark.json',
+                        help='file to write the results to')
+    args = parser.parse_args()
+
+    corpus = scrambles(args.count, args.seed)
+    results = {'count': args.count, 'seed': args.seed, 'costs': args.costs,
+               'selectors': {}}
+    print '{:<12}{:>16}{:>16}{:>16}'.format('selector', *METRICS)
+    for name in args.selectors:
+        runs = run(name, corpus, args.seed, MODELS.get(args.costs))
+        summary = summarize(runs)
+        results['selectors'][name] = {'runs': runs, 'summary': summary}
+        print '{:<12}{:>16}{:>16}{:>16}'.format(name, *[
+              '{:g} / {:g}'.format(round(summary[metric]['median'], 1),
+                                   round(summary[metric]['p95'], 1))
+              for metric in METRICS])
+
+    with open(args.out, 'w') as out:
+        dump(results, out, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
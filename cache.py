@@ -0,0 +1,117 @@
+"""A persistent cache of solutions, keyed by cube state.
+
+Solving takes tens of seconds, and the same cubes come up again and
+again, so finished solutions are stored in an SQLite database and served
+immediately the next time their cube is asked for:
+
+    cache = Cache()
+    solution = cache.get(cube)
+    if solution is None:
+        solution = solve(...)[2]
+        cache.put(cube, solution)
+
+Solutions are lists of move ids, as solve returns them. Keys are
+canonical states under all 48 symmetries (see symmetry.py), so a
+solution serves every cube symmetric to the one it was found for. It is
+stored for the canonical state, packed 5 bits per move, and translated
+back on the way out.
+
+The cache holds at most `capacity` solutions. When it is full, the least
+recently used one is evicted. Hits and misses are counted in the
+database too, so the statistics cover every process using the file.
+
+Jason Mahr
+"""
+
+
+from constants import CACHE_CAPACITY, CACHE_FILE
+from history import pack_moves, unpack_moves
+from sequences import pack
+import sqlite3
+from state import flatten
+from symmetry import INVERSES, canonical, translate
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    key BLOB PRIMARY KEY, solution BLOB NOT NULL, used INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO stats VALUES ('hits', 0);
+INSERT OR IGNORE INTO stats VALUES ('misses', 0);
+"""
+
+
+def key(cube):
+    """Returns the cache key of a cube, its packed canonical state, and
+    the index of the symmetry taking the cube there.
+    """
+    state, symmetry = canonical(flatten(cube))
+    return sqlite3.Binary(pack(state)), symmetry
+
+
+class Cache:
+    """Solutions by cube state, in the SQLite database at `path`."""
+    def __init__(self, path=CACHE_FILE, capacity=CACHE_CAPACITY):
+        self.capacity = capacity
+
+        # Servers share one cache between their request threads
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def tick(self):
+        """Returns the next value of the use counter."""
+        used, = self.db.execute('SELECT MAX(used) FROM solutions').fetchone()
+        return (used or 0) + 1
+
+    def get(self, cube):
+        """Returns the stored solution of a cube, or None if there is
+        none, and counts the hit or miss. A solution that does not unpack
+        is deleted and counts as a miss.
+        """
+        cube_key, symmetry = key(cube)
+        with self.db:
+            row = self.db.execute('SELECT solution FROM solutions '
+                                  'WHERE key = ?', (cube_key,)).fetchone()
+            stored = None
+            if row is not None:
+                try:
+                    stored = unpack_moves(str(row[0]))
+                except ValueError:
+                    self.db.execute('DELETE FROM solutions WHERE key = ?',
+                                    (cube_key,))
+            self.db.execute('UPDATE stats SET value = value + 1 '
+                            'WHERE name = ?', ('misses' if stored is None
+                                               else 'hits',))
+            if stored is None:
+                return None
+            self.db.execute('UPDATE solutions SET used = ? WHERE key = ?',
+                            (self.tick(), cube_key))
+        return translate(stored, INVERSES[symmetry])
+
+    def put(self, cube, solution):
+        """Stores a complete solution of a cube, evicting the least
+        recently used solutions beyond capacity.
+        """
+        cube_key, symmetry = key(cube)
+        stored = pack_moves(translate(solution, symmetry))
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO solutions '
+                            'VALUES (?, ?, ?)', (cube_key,
+                                                 sqlite3.Binary(stored),
+                                                 self.tick()))
+            self.db.execute('DELETE FROM solutions WHERE key IN '
+                            '(SELECT key FROM solutions ORDER BY used DESC '
+                            'LIMIT -1 OFFSET ?)', (self.capacity,))
+
+    def stats(self):
+        """Returns the hits, misses and number of stored solutions."""
+        stats = dict((str(name), value) for name, value
+                     in self.db.execute('SELECT name, value FROM stats'))
+        stats['size'], = self.db.execute(
+            'SELECT COUNT(*) FROM solutions').fetchone()
+        return stats
+
+    def close(self):
+        self.db.close()
@@ -84,7 +84,6 @@ G3B_MOVES = (7, 10, 13, 16)
 G3C_MOVES = (13, 16)
 MOVE_CHOICES = (G0_MOVES, G1_MOVES, G1_MOVES, G2_MOVES, G3A_MOVES, G3B_MOVES,
                 G3C_MOVES)
-NUM_MOVE_CHOICES = map(len, MOVE_CHOICES)
 NUM_PHASES = len(MOVE_CHOICES)
 MAX_NUM_MOVES = [8, 6, 14, 16, 10, 8, 2]
 FITNESS_WEIGHT = 10
@@ -94,9 +93,133 @@ SIZE_WEIGHT = 19
 """Constants."""
 POP_SIZE = 11700
 NUM_SURVIVORS = 390
+NUM_REPLACEMENTS = POP_SIZE - NUM_SURVIVORS
 MAX_PHASE_2_GENERATIONS_BEFORE_RESET = 30
 NUM_SELECTIONS = 100000
+NUM_MUTATIONS = 100000
 GEOMETRIC_SELECTION = True
+TOURNAMENT_SIZE = 3
+
+
+## For finisher.py
+
+
+"""Once phase FINISHER_PHASE (0-indexed) begins, solves finish the cube
+by search, unless USE_FINISHER is False. Every cube in that phase is
+within FINISHER_DEPTH half turns of solved.
+"""
+FINISHER_PHASE = 4
+FINISHER_DEPTH = 15
+USE_FINISHER = True
+
+
+## For g3table.py
+
+
+"""The distance table of the half-turn group, built by g3table.py."""
+G3_TABLE_FILE = 'g3table.dat'
+
+
+## For macros.py
+
+
+"""A mutation is one of the phase's macros with probability MACRO_RATE.
+Each phase keeps at most MACRO_LIMIT macros of up to MACRO_MAX_LENGTH
+moves.
+"""
+MACRO_RATE = 0.05
+MACRO_LIMIT = 100
+MACRO_MAX_LENGTH = 20
+MACROS_FILE = 'macros.json'
+
+
+## For optimize.py
+
+
+"""Solutions are shortened by replacing windows of up to SHORTEN_WINDOW
+moves with sequences of up to SHORTEN_DEPTH moves. Solves shorten their
+solutions unless SHORTEN_SOLUTIONS is False.
+"""
+SHORTEN_DEPTH = 4
+SHORTEN_WINDOW = 12
+SHORTEN_SOLUTIONS = True
+
+
+## For sequences.py
+
+
+"""The index of shortest sequences written by sequences.py."""
+SEQUENCES_FILE = 'sequences.dat'
+
+
+## For symmetry.py
+
+
+"""Where each side sits in space, as its outward normal and the
+directions of its tile columns and rows (right and down in the net of
+app.py), with x to the right, y up and z toward the viewer of F.
+`TILE_OFFSETS` gives the column and row of each index from the center.
+"""
+FACE_AXES = (((-1, 0, 0), (0, 0, 1), (0, -1, 0)),
+             ((1, 0, 0), (0, 0, -1), (0, -1, 0)),
+             ((0, 0, 1), (1, 0, 0), (0, -1, 0)),
+             ((0, 0, -1), (-1, 0, 0), (0, -1, 0)),
+             ((0, 1, 0), (1, 0, 0), (0, 0, 1)),
+             ((0, -1, 0), (1, 0, 0), (0, 0, -1)))
+TILE_OFFSETS = ((-1, -1), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1),
+                (-1, 0))
+
+
+## For cache.py
+
+
+"""The solution cache and the most solutions it keeps."""
+CACHE_FILE = 'solutions.db'
+CACHE_CAPACITY = 10000
+
+
+## For costs.py
+
+
+"""Turn costs by rotation (clockwise, half, counterclockwise), and the
+cost of changing the axis being turned.
+"""
+TURN_COSTS = (1, 2, 1)
+REGRIP_COST = 3
+
+
+## For ranking.py
+
+
+"""How many distinct candidates a solve considers for each solution it
+returns.
+"""
+CANDIDATES_PER_SOLUTION = 4
+
+
+## For validate.py
+
+
+"""Reasons returned by validate.check. Only VALID cubes are solvable."""
+VALID = 'valid'
+BAD_COLOR = 'bad color'
+EDGE_FLIP = 'edge flip parity'
+CORNER_TWIST = 'corner twist'
+PERMUTATION_PARITY = 'permutation parity'
+
+
+## For progress.py
+
+
+"""Seconds between progress events unless the phase changes."""
+PROGRESS_INTERVAL = 0.5
+
+
+## For server.py
+
+
+"""Seconds a finished job's result is kept for polling."""
+JOB_TTL = 600
 
 
 ## For app.py
@@ -104,6 +227,7 @@ GEOMETRIC_SELECTION = True
 
 """Basics"""
 MINWIDTH, MINHEIGHT = 590, 0
+FRAME_RATE = 20
 FONT = 'Comic Sans MS'
 BASE_SIZE = 12
 TAB = " " * 6
@@ -170,6 +294,16 @@ TILES = [[(ADDR[x], ADDR[y]) for x, y in side] for side in INDS]
 PANEL = [(ADDR[x], ADDR[y]) for x, y in PANEL_INDS]
 
 
+"""Click lookup. `ADDR_STARTS` is searched to find the slot of a pixel,
+and `SLOTS` maps a slot to the tile there, either (side, index), or just
+the side for the panel tiles.
+"""
+ADDR_STARTS = [x1 for x1, x2 in ADDR]
+SLOTS = dict([(slot, (side, index)) for side in range(6)
+              for index, slot in enumerate(INDS[side])] +
+             [(slot, side) for side, slot in enumerate(PANEL_INDS)])
+
+
 """Step 2 Labels."""
 LABEL = ('Left', 'Right', 'Front', 'Back', 'Top', 'Bottom')
 LABEL_XY = ((110, 153), (356, 153), (135, 312), (479, 153), (233, 30),
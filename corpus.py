@@ -0,0 +1,47 @@
+"""Fixed corpora of seeded scrambles, used for benchmarking and batch
+solving.
+
+A scramble is a list of move strings in MOVES notation, exactly as
+Cube.scramble prints it. In files, a scramble is one line of moves
+separated by spaces.
+
+Jason Mahr
+"""
+
+
+from constants import MOVES
+from cube import Cube
+from streams import make_rng
+
+
+def scrambles(count, seed):
+    """Returns `count` scrambles. The same seed gives the same corpus."""
+    rng = make_rng(seed)
+    cube = Cube()
+    return [[MOVES[move] for move in cube.scramble(rng, verbose=False)]
+            for _ in range(count)]
+
+
+def scrambled(scramble):
+    """Returns a new cube with the given scramble applied."""
+    cube = Cube()
+    for move in scramble:
+        cube.move(MOVES.index(move))
+    cube.clear_history()
+    return cube
+
+
+def parse(line):
+    """Returns the scramble written on a line. Raises ValueError if the
+    line contains anything other than moves in MOVES notation.
+    """
+    scramble = line.split()
+    for move in scramble:
+        if move not in MOVES:
+            raise ValueError('unknown move {!r}'.format(move))
+    return scramble
+
+
+def format_scramble(scramble):
+    """Writes a scramble as a line, the inverse of parse."""
+    return ' '.join(scramble)
@@ -0,0 +1,57 @@
+"""Move cost models.
+
+The genetic algorithm weighs the size of each cube's move history into
+its fitness score, and alternative solutions can be ranked by cost (see
+ranking.py). By default every move costs 1. A cost model instead prices
+each move by its rotation, TURN_COSTS by default, plus a regrip cost
+whenever it turns a different axis than the move before, as a robot
+holding the cube by one axis must let go and grip another.
+
+A model is a table indexed by the previous move id, or by START for the
+first move, then by the move id. History.size adds up the table while it
+walks the history, so pricing a history takes no extra pass.
+
+SIZE_WEIGHT is tuned for sizes that count moves, so fitness scores sum a
+copy of the table scaled to cost 1 per move on average. A model then
+changes which moves are cheap, but not how much the size weighs against
+the fitness as a whole.
+
+Jason Mahr
+"""
+
+
+from constants import REGRIP_COST, TURN_COSTS
+
+
+"""Row of a cost table for the first move, which has no move before it."""
+START = 18
+
+
+class CostModel:
+    """Prices moves by rotation (clockwise, half, counterclockwise) and
+    charges `regrip` for every change of axis.
+    """
+    def __init__(self, turns=TURN_COSTS, regrip=0):
+        self.table = [[turns[move % 3] +
+                       (regrip if previous != START and
+                        previous // 6 != move // 6 else 0)
+                       for move in range(18)] for previous in range(19)]
+
+        # Mean cost of a move following another
+        mean = sum(map(sum, self.table[:START])) / (START * 18.0)
+        self.scores = [[cost / mean for cost in row] for row in self.table]
+
+    def cost(self, moves):
+        """Returns the cost of a list of move ids."""
+        cost, previous = 0, START
+        for move in moves:
+            cost += self.table[previous][move]
+            previous = move
+        return cost
+
+
+"""Models by name. 'moves' counts moves, as the fitness score does when
+no model is given.
+"""
+MODELS = {'moves': CostModel((1, 1, 1)), 'turns': CostModel(),
+          'robot': CostModel(regrip=REGRIP_COST)}
@@ -6,7 +6,7 @@ Jason Mahr
 
 from constants import *
 from history import History
-from random import random
+from streams import DEFAULT
 
 
 class Cube:
@@ -84,6 +84,14 @@ class Cube:
         self.fitness_score = 0
 
 
+        """Dirty flag: True whenever the tiles have changed since the
+        fitness was last computed. Cubes that are not dirty keep their
+        fitness and fitness score, which saves rescoring survivors (and
+        their copies) that received zero moves in a mutation.
+        """
+        self.dirty = True
+
+
     """Data I/O. Prevents other code from directly accessing attributes.
     """
 
@@ -102,16 +110,37 @@ class Cube:
     
     def set(self, (side, index), color):
         self.cube[side][index] = color
+        self.dirty = True
 
     
     def get_cube(self):
         return [side[:] for side in self.cube]
 
+
+    def matches(self, cube):
+        """Whether the tiles equal a 6 x 8 array, such as a goal state.
+        This is a single list comparison rather than 48 calls to get.
+        """
+        return self.cube == cube
+
+
+    def set_cube(self, cube):
+        """Inverse of get_cube: sets all tiles from a 6 x 8 array."""
+        self.cube = [list(side) for side in cube]
+        self.dirty = True
+
     
     def get_history(self):
         return self.history.get()
 
 
+    def get_moves(self):
+        """Like get_history, but as move ids, which is all the algorithm
+        needs. Leave strings for output.
+        """
+        return self.history.ids()
+
+
     def get_history_ptr(self):
         return self.history
 
@@ -120,8 +149,8 @@ class Cube:
         self.history.clear()
 
 
-    def size(self):
-        return self.history.size()
+    def size(self, table=None):
+        return self.history.size(table)
 
 
     def get_fitness(self):
@@ -133,11 +162,19 @@ class Cube:
 
 
     def get_fitness_score(self):
-        return self.size
+        return self.fitness_score
         
     
     def set_fitness_score(self, fitness_score):
         self.fitness_score = fitness_score
+
+
+    def is_dirty(self):
+        return self.dirty
+
+
+    def set_dirty(self, dirty=True):
+        self.dirty = dirty
     
 
     """Moves
@@ -285,22 +322,27 @@ class Cube:
         else:
             self.__ccw(side)
         self.history.add(move_id)
+        self.dirty = True
 
 
-    def scramble(self):
-        """Executes 100 non-redundant random moves.
+    def scramble(self, rng=DEFAULT, verbose=True):
+        """Executes 100 non-redundant random moves drawn from `rng` and
+        returns them as move ids.
 
         20 moves is enough to get to every possible Rubik's Cube
         configuration. 100 moves is more than enough for randomness.
 
-        Result is printed to the terminal to help with testing.
+        Unless `verbose` is False, the result is printed to the terminal
+        to help with testing.
         """
         self.reset()
         while self.size() < 100:
-            self.move(int(random() * 18))
-        moves_made = self.get_history()
+            self.move(int(rng.random() * 18))
+        moves_made = self.get_moves()
         self.clear_history()
-        print 'Scramble:', moves_made
+        if verbose:
+            print 'Scramble:', [MOVES[move] for move in moves_made]
+        return moves_made
         
 
     """Cube Operations"""
@@ -315,3 +357,4 @@ class Cube:
         self.history.copy(other.get_history_ptr())
         self.fitness = other.get_fitness()
         self.fitness_score = other.get_fitness_score()
+        self.dirty = other.is_dirty()
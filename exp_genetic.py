@@ -40,7 +40,7 @@ def dedup(gene):
 
 
 def new_allele(phase):
-    return MOVE_CHOICES[phase][int(random() * NUM_MOVE_CHOICES[phase])]
+    return MOVE_CHOICES[phase][int(random() * len(MOVE_CHOICES[phase]))]
 
 
 def new_gene(length, phase):
@@ -0,0 +1,175 @@
+"""A complete distance table of the half-turn group, G3.
+
+Every cube that only needs half turns (G3A_MOVES) is in one of 663,552
+states. In those states each corner stays in its tetrad, the four
+corners it shares with no edge-adjacent neighbor, and each edge stays in
+its slice, so a state is the permutation of four pieces in each of five
+orbits: two corner tetrads and three edge slices. The state's index is
+the five permutation ranks as digits in base 24.
+
+The table has a byte for each of the 24 ** 5 indices. A state's byte
+holds its distance from solved above the index, in G3A_MOVES, of a move
+that brings it one closer:
+
+    distance << 3 | move
+
+Bytes of unreachable indices are UNREACHED. Walking the table from any
+state in the group gives a shortest solution, one byte per move.
+
+Build the table once: python g3table.py [--out FILE]
+
+Jason Mahr
+"""
+
+
+from argparse import ArgumentParser
+from constants import G3A_MOVES, G3_TABLE_FILE
+from itertools import permutations
+import os
+from state import PERMS
+from time import time
+from validate import CORNER_LOOKUP, CORNER_POS, EDGE_LOOKUP, EDGE_POS
+from zlib import compress, decompress
+
+
+"""The orbits, as lists of the positions in EDGE_POS or CORNER_POS: the
+two corner tetrads, then the E, M and S slices. `ORBIT_PIECES` lists the
+pieces (as indexed by CORNER_LOOKUP or EDGE_LOOKUP) that belong at those
+positions, in the same order.
+"""
+CORNER_ORBITS = ((0, 1, 2, 3), (4, 5, 6, 7))
+EDGE_ORBITS = ((0, 2, 4, 6), (8, 9, 10, 11), (1, 3, 5, 7))
+ORBIT_TILES = ([[CORNER_POS[i] for i in orbit] for orbit in CORNER_ORBITS] +
+               [[EDGE_POS[i] for i in orbit] for orbit in EDGE_ORBITS])
+ORBIT_PIECES = [[(CORNER_LOOKUP if len(tiles) == 3 else EDGE_LOOKUP)[
+                     tuple([side for side, index in tiles])][0]
+                 for tiles in positions] for positions in ORBIT_TILES]
+
+"""Permutations of four pieces and their ranks."""
+ORDERINGS = list(permutations(range(4)))
+RANKS = dict((ordering, rank) for rank, ordering in enumerate(ORDERINGS))
+
+SIZE = 24 ** 5
+UNREACHED = 0xff
+
+
+def flat((side, index)):
+    """Returns the position of a tile in a state."""
+    return 8 * side + index
+
+
+def transitions(move):
+    """Returns, for each orbit, how a move changes its permutation rank.
+
+    A move sends each piece from one position to another. The piece a
+    position receives is read off the move's permutation (see state.py)
+    through the position's first tile.
+    """
+    tables = []
+    for positions in ORBIT_TILES:
+        tiles = [set(map(flat, position)) for position in positions]
+        sources = []
+        for position in positions:
+            source = PERMS[move][flat(position[0])]
+            sources.append([source in orbit for orbit in tiles].index(True))
+        tables.append([RANKS[tuple([ordering[source] for source in sources])]
+                       for ordering in ORDERINGS])
+    return tables
+
+
+TRANSITIONS = [transitions(move) for move in G3A_MOVES]
+
+
+def index(state):
+    """Returns the table index of a state, or None if it is not in G3:
+    a piece is outside its orbit, or twisted or flipped.
+    """
+    ranks = []
+    for positions, orbit_pieces in zip(ORBIT_TILES, ORBIT_PIECES):
+        lookup = CORNER_LOOKUP if len(positions[0]) == 3 else EDGE_LOOKUP
+        pieces = []
+        for position in positions:
+            colors = tuple([state[flat(tile)] for tile in position])
+            piece, twisted = lookup.get(colors, (None, True))
+            if twisted or piece not in orbit_pieces:
+                return None
+            pieces.append(orbit_pieces.index(piece))
+        ranks.append(RANKS[tuple(pieces)])
+    a, b, e, m, s = ranks
+    return (((a * 24 + b) * 24 + e) * 24 + m) * 24 + s
+
+
+def step(table_index, move_index):
+    """Returns the index after the move G3A_MOVES[move_index]."""
+    rest, s = divmod(table_index, 24)
+    rest, m = divmod(rest, 24)
+    rest, e = divmod(rest, 24)
+    a, b = divmod(rest, 24)
+    ta, tb, te, tm, ts = TRANSITIONS[move_index]
+    return (((ta[a] * 24 + tb[b]) * 24 + te[e]) * 24 + tm[m]) * 24 + ts[s]
+
+
+def build():
+    """Returns the table, by breadth-first search from solved. Half
+    turns undo themselves, so the move that reaches a state from one
+    nearer to solved also brings it back.
+    """
+    table = bytearray([UNREACHED]) * SIZE
+    table[0] = 0
+    frontier = [0]
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for parent in frontier:
+            for move_index in range(len(G3A_MOVES)):
+                child = step(parent, move_index)
+                if table[child] == UNREACHED:
+                    table[child] = distance << 3 | move_index
+                    next_frontier.append(child)
+        frontier = next_frontier
+    return table
+
+
+def save(table, path=G3_TABLE_FILE):
+    with open(path, 'wb') as stored:
+        stored.write(compress(str(table)))
+
+
+def load(path=G3_TABLE_FILE):
+    """Returns the table stored at `path`, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as stored:
+        return bytearray(decompress(stored.read()))
+
+
+def walk(table, state):
+    """Returns a shortest list of half turns solving a state, or None if
+    the state is not in G3.
+    """
+    table_index = index(state)
+    if table_index is None or table[table_index] == UNREACHED:
+        return None
+    moves = []
+    while table[table_index]:
+        move_index = table[table_index] & 7
+        moves.append(G3A_MOVES[move_index])
+        table_index = step(table_index, move_index)
+    return moves
+
+
+def main():
+    parser = ArgumentParser(description='Build the G3 distance table.')
+    parser.add_argument('--out', default=G3_TABLE_FILE)
+    args = parser.parse_args()
+
+    start = time()
+    table = build()
+    reached = SIZE - table.count(chr(UNREACHED))
+    print '{} states in {:.1f} seconds'.format(reached, time() - start)
+    save(table, args.out)
+
+
+if __name__ == '__main__':
+    main()
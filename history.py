@@ -1,11 +1,58 @@
 """Move histories as nested lists. Linked lists were tried as an
 experiment. See Section 4.2 of the paper for more details.
 
+Histories are read as move ids, and solutions are returned as move ids.
+format_moves writes them in MOVES notation, only where they are output,
+and pack_moves stores them at 5 bits each, for caches.
+
 Jason Mahr
 """
 
 
 from constants import MOVES
+from struct import pack, unpack_from
+
+
+def format_moves(moves):
+    """Returns move ids in MOVES notation, separated by spaces."""
+    return ' '.join([MOVES[move] for move in moves])
+
+
+def pack_moves(moves):
+    """Returns a list of move ids as a byte string: the number of moves,
+    then 5 bits per move, first move in the lowest bits.
+    """
+    bits = 0
+    for move in reversed(moves):
+        bits = bits << 5 | move
+    data = bytearray()
+    for _ in range((5 * len(moves) + 7) // 8):
+        data.append(bits & 0xff)
+        bits >>= 8
+    return pack('>H', len(moves)) + str(data)
+
+
+def unpack_moves(data):
+    """Returns the list of move ids packed by pack_moves. Raises
+    ValueError if the data is not as long as its count says, or holds
+    a number that is not a move id.
+    """
+    if len(data) < 2:
+        raise ValueError('packed moves have no count')
+    count, = unpack_from('>H', data)
+    if len(data) != 2 + (5 * count + 7) // 8:
+        raise ValueError('{} bytes cannot hold {} packed moves'.format(
+                         len(data), count))
+    bits = 0
+    for byte in reversed(bytearray(data[2:])):
+        bits = bits << 8 | byte
+    moves = [None] * count
+    for i in range(count):
+        moves[i] = bits & 31
+        if moves[i] >= len(MOVES):
+            raise ValueError('{} is not a move id'.format(moves[i]))
+        bits >>= 5
+    return moves
 
 
 class History:
@@ -31,14 +78,39 @@ class History:
         """Returns moves as a list of strings in reverse (correct) order
         after first removing redundancies.
         """
+        return [MOVES[move] for move in self.ids()]
+
+    def ids(self):
+        """Returns moves as a list of move ids in reverse (correct)
+        order after first removing redundancies.
+        """
         size = self.size()
         moves = [None] * size
         ptr = self.history
         for i in range(size - 1, -1, -1):
-            moves[i], ptr = MOVES[ptr[0]], ptr[1]
+            moves[i], ptr = ptr[0], ptr[1]
         return moves
+
+    def latest(self):
+        """Yields move ids from the most recent back, after first
+        removing redundancies. Nothing is copied.
+        """
+        self.size()
+        ptr = self.history
+        while ptr:
+            yield ptr[0]
+            ptr = ptr[1]
+
+    def __iter__(self):
+        """Yields move ids in order after first removing redundancies.
+        The history is stored newest first, so the moves are gathered
+        before the first one is yielded.
+        """
+        moves = list(self.latest())
+        while moves:
+            yield moves.pop()
     
-    def size(self):
+    def size(self, table=None):
         """This function removes redundancies from a move history in
         place, returning the resulting number of moves. Redundancies
         removed include pairs (e.g. l l' -> nothing) and sandwiches
@@ -48,6 +120,9 @@ class History:
         Removing redundancies is necessary since size is incorporated
         into fitness scores, and also so that the solution received by
         the end user is not redundant.
+
+        Given the table of a cost model (see costs.py), it returns the
+        cost of the moves instead, added up along the same walk.
         """
 
         """The prepended anchor is used to track the head and later
@@ -83,6 +158,7 @@ class History:
         size = 0
         while not size:
             size = 1
+            cost = 0
 
             """While current and current[1] are not None. Current needs
             to be checked since the move history could have been empty.
@@ -172,14 +248,23 @@ class History:
                     # If no redundancies, and no changes yet, increment.
                     if size:
                         size += 1
+                        if table is not None:
+                            # Moves are in reverse, so current[1] came first
+                            cost += table[current[1][0]][current[0]]
                     previous, current = current, current[1]
 
+            # The first move made has no move before it
+            if table is not None and current:
+                cost += table[-1][current[0]]
+
             # Prepare for next loop in case size is 0.
             previous = self.history
             current = previous[1]
 
         # Clean up by removing prepended anchor
         self.history = self.history[1]
+        if table is not None:
+            return cost
 
         """Return. Since the size was made to be 1 in order to check
         for changes, if `self.history` = None we need to return 0
@@ -0,0 +1,91 @@
+"""Macro moves: move sequences that completed a phase in earlier solves.
+
+Whenever a solve moves on to the next phase, the best cube's moves for
+the phase it just completed are recorded in a Library under that phase.
+The best cube descends from one of the survivors at the start of the
+phase, so its moves for the phase are what follows the longest prefix
+it shares with any of them. Mutations for a phase then apply one of its
+macros, instead of random single moves, with probability MACRO_RATE.
+
+History.size can merge the last move of one phase with the first of the
+next, so a macro is trimmed to the moves after the last one that is not
+legal in its phase. That keeps mutations inside the phase's subgroup.
+
+The library persists between runs as a JSON file of move ids by phase:
+
+    library = Library.load()
+    solve(cube, selector, mailbox, library=library)
+    library.save()
+
+Jason Mahr
+"""
+
+
+from constants import (MACRO_LIMIT, MACRO_MAX_LENGTH, MACROS_FILE,
+                       MOVE_CHOICES, NUM_PHASES)
+from json import dump, load
+import os
+
+
+def segment(starts, after):
+    """Returns the moves of `after` past the longest prefix it shares
+    with any of the histories in `starts`. All are lists of move ids.
+    """
+    longest = 0
+    for before in starts:
+        common = 0
+        for move_before, move_after in zip(before, after):
+            if move_before != move_after:
+                break
+            common += 1
+        longest = max(longest, common)
+    return after[longest:]
+
+
+class Library:
+    """Macros by phase, at most MACRO_LIMIT for each. Recording a macro
+    already in the library moves it to the back; when a phase is full,
+    the least recently recorded macro is dropped.
+    """
+    def __init__(self, macros=None, path=MACROS_FILE):
+        self.macros = [[] for _ in range(NUM_PHASES)]
+        self.path = path
+        for phase, phase_macros in (macros or {}).items():
+            self.macros[int(phase)] = [tuple(macro) for macro in phase_macros]
+
+    @classmethod
+    def load(cls, path=MACROS_FILE):
+        """Returns the library saved at `path`, or an empty one."""
+        if not os.path.exists(path):
+            return cls(path=path)
+        with open(path) as library:
+            return cls(load(library), path)
+
+    def save(self):
+        with open(self.path, 'w') as library:
+            dump(dict((phase, macros) for phase, macros
+                      in enumerate(self.macros) if macros), library)
+
+    def get(self, phase):
+        return self.macros[phase]
+
+    def record(self, phase, moves):
+        """Records moves, a list of move ids, as a macro for the given
+        phase, trimmed to the moves legal in the phase. Returns whether
+        they qualified.
+        """
+        choices = MOVE_CHOICES[phase]
+        for i in range(len(moves) - 1, -1, -1):
+            if moves[i] not in choices:
+                moves = moves[i + 1:]
+                break
+        if not moves or len(moves) > MACRO_MAX_LENGTH:
+            return False
+        macro = tuple(moves)
+        macros = self.macros[phase]
+        if macro in macros:
+            macros.remove(macro)
+        elif len(macros) == MACRO_LIMIT:
+            del macros[0]
+        macros.append(macro)
+        return True
@@ -0,0 +1,63 @@
+"""Post-optimization of solutions.
+
+Each phase of the genetic algorithm is solved greedily, and History.size
+only removes pairs and sandwiches, so a finished solution often contains
+runs of moves with a much shorter equivalent. This module finds them by
+peephole replacement: every window of the solution is applied to the
+labeled cube state.IDENTITY, and if the resulting state is in a table of
+shortest sequences, the window is replaced by the shorter sequence. The
+passes repeat until nothing changes, since a replacement can expose new
+cancellations with the moves around it.
+
+The table is the one for all 18 moves in sequences.py, loaded from the
+index on disk if there is one and generated on first use otherwise.
+
+Jason Mahr
+"""
+
+
+from constants import G0_MOVES, MOVES, SHORTEN_WINDOW
+from sequences import get_table, pack, unpack
+from state import IDENTITY, MOVERS
+
+
+def shorten_pass(moves, table, window=SHORTEN_WINDOW):
+    """Replaces, from left to right, the longest window at each position
+    that has a shorter equivalent in `table`. Returns the new list of
+    move ids and whether anything was replaced.
+    """
+    shortened, changed = [], False
+    i, size = 0, len(moves)
+    while i < size:
+        state, end, replacement = IDENTITY, None, None
+        for j in range(i, min(size, i + window)):
+            state = MOVERS[moves[j]](state)
+            found = table.get(pack(state))
+            if found is not None and len(found) <= j - i:
+                end, replacement = j + 1, found
+        if end is None:
+            shortened.append(moves[i])
+            i += 1
+        else:
+            shortened.extend(unpack(replacement))
+            i, changed = end, True
+    return shortened, changed
+
+
+def shorten_ids(moves, table=None, window=SHORTEN_WINDOW):
+    """Returns an equivalent list of move ids, shortened to a fixpoint."""
+    if table is None:
+        table = get_table(G0_MOVES)
+    changed = True
+    while changed:
+        moves, changed = shorten_pass(moves, table, window)
+    return moves
+
+
+def shorten(solution, table=None, window=SHORTEN_WINDOW):
+    """Returns a shortened copy of a solution in MOVES notation, such as
+    population[0].get_history().
+    """
+    moves = shorten_ids([MOVES.index(move) for move in solution], table,
+                        window)
+    return [MOVES[move] for move in moves]
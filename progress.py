@@ -0,0 +1,117 @@
+"""Background solves with throttled progress events.
+
+Python 2 has no asyncio, so the solve runs on a worker thread and its
+progress is exposed as an iterator of events, fed through a queue:
+
+    task = Task(cube, selector)
+    for event in task:
+        print event.generation, event.phase, event.fitness, event.elapsed
+    time, generations, solution, phase, fitness = task.result()
+
+Jason Mahr
+"""
+
+
+from algorithm import solve
+from collections import namedtuple
+from constants import PROGRESS_INTERVAL
+from Queue import Empty, Queue
+from streams import DEFAULT
+from threading import Event, Thread
+from time import time as now
+
+
+"""A progress event. `phase` is 1-indexed, as in the mailbox, and
+`skipped` is the fraction of evaluations skipped in the generation.
+"""
+Progress = namedtuple('Progress', 'generation phase fitness elapsed skipped')
+
+
+class Throttle:
+    """A mailbox that forwards progress to `mailbox` at most once every
+    `interval` seconds, plus whenever the phase changes. The mailbox is
+    called every generation, so this keeps whatever the progress feeds
+    (a queue, a GUI, a network) from adding to the run time.
+    """
+    def __init__(self, mailbox, interval=PROGRESS_INTERVAL):
+        self.mailbox = mailbox
+        self.interval = interval
+        self.last = None
+        self.phase = None
+
+    def __call__(self, generations, phase, fitness, time, skipped):
+        current = now()
+        if (self.last is None or phase != self.phase or
+            current - self.last >= self.interval):
+            self.last, self.phase = current, phase
+            self.mailbox(Progress(generations, phase, fitness, time,
+                                  skipped))
+
+
+class Task:
+    """A solve running on a background thread. Iterating over the task
+    yields its Progress events until the solve finishes. Alternatively,
+    poll returns the pending events without waiting, for callers with an
+    event loop of their own, such as the GUI.
+
+    A cancelled task stops after the current generation and its result
+    is the best partial result, as with a deadline.
+    """
+    def __init__(self, cube, selector, deadline=None, rng=DEFAULT,
+                 interval=PROGRESS_INTERVAL):
+        self.events = Queue()
+        self.cancelled = Event()
+        self.solution = None
+        self.error = None
+        self.thread = Thread(target=self.run, args=(cube, selector, deadline,
+                                                   rng, interval))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self, cube, selector, deadline, rng, interval):
+        mailbox = Throttle(self.events.put, interval)
+        try:
+            self.solution = solve(cube, selector, mailbox, deadline, rng,
+                                  self.cancelled)
+        except Exception as error:
+            self.error = error
+        finally:
+            self.events.put(None)
+
+    def __iter__(self):
+        while True:
+            try:
+                # A timeout keeps the wait interruptible with Ctrl-C
+                event = self.events.get(timeout=1)
+            except Empty:
+                continue
+            if event is None:
+                return
+            yield event
+
+    def poll(self):
+        """Returns the events that are waiting, without blocking."""
+        events = []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except Empty:
+                return events
+            if event is not None:
+                events.append(event)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def done(self):
+        return not self.thread.is_alive()
+
+    def result(self):
+        """Waits for the solve and returns its result. Re-raises any
+        error from the solve.
+        """
+        while self.thread.is_alive():
+            self.thread.join(1)
+        if self.error is not None:
+            raise self.error
+        return self.solution
@@ -0,0 +1,27 @@
+"""Ranking of alternative solutions.
+
+A solve can return several distinct solutions from its final generation
+(see the `top` argument of algorithm.solve). Fewer moves is not always
+faster to execute: a robot may take longer over a half turn than over a
+quarter turn, or over a regrip. So solutions are ranked either by
+length, with cost breaking ties, or by cost, with length breaking ties.
+Costs come from a cost model (see costs.py), by default the one pricing
+turns by TURN_COSTS. Solutions are lists of move ids.
+
+Jason Mahr
+"""
+
+
+from costs import MODELS
+
+
+def rank(solutions, by='length', model=MODELS['turns']):
+    """Returns solutions sorted by 'length' or by 'cost'."""
+    cost = model.cost
+    if by == 'length':
+        key = lambda solution: (len(solution), cost(solution))
+    elif by == 'cost':
+        key = lambda solution: (cost(solution), len(solution))
+    else:
+        raise ValueError('unknown ranking {!r}'.format(by))
+    return sorted(solutions, key=key)
@@ -1,23 +1,110 @@
-"""Implementation of a Rank and a Geometric selector.
+"""Implementation of Rank, Geometric, Tournament and Universal
+selectors.
 
 The Geometric selector performed better in tests.
 
+Every selector has a `parents` method that returns the survivor indices
+for all NUM_REPLACEMENTS replacements of a generation in one call.
+
 Jason Mahr
 """
 
 
-from constants import NUM_SELECTIONS, NUM_SURVIVORS
-from random import random
+from bisect import bisect_right
+from constants import (NUM_REPLACEMENTS, NUM_SELECTIONS, NUM_SURVIVORS,
+                       TOURNAMENT_SIZE)
+from streams import DEFAULT
+
+
+def rank_fitnesses():
+    """Cumulative fitnesses and their sum for rank selection."""
+
+    # Calculate fitnesses
+    fitnesses = [NUM_SURVIVORS - rank for rank in range(NUM_SURVIVORS)]
+
+    # Cumulative fitnesses
+    for i in range(1, NUM_SURVIVORS):
+        fitnesses[i] += fitnesses[i - 1]
+    return fitnesses, fitnesses[NUM_SURVIVORS - 1]
+
 
+def geometric_fitnesses():
+    """Cumulative fitnesses and their sum for geometric selection."""
 
-class Rank:
+    # Calculate cumulative fitnesses
+    ratio = (NUM_SURVIVORS - 1.) / NUM_SURVIVORS
+    prob = (1. / NUM_SURVIVORS) / (1 - ratio ** NUM_SURVIVORS)
+    fitnesses = [None] * NUM_SURVIVORS
+    fitnesses[0] = prob
+    fitnesses[NUM_SURVIVORS - 1] = 1
+    for i in range(1, NUM_SURVIVORS - 1):
+        prob *= ratio
+        fitnesses[i] = fitnesses[i - 1] + prob
+
+    # Since probabilities are from 0 to 1, the sum is 1
+    return fitnesses, 1
+
+
+class Selector:
+    """Shared machinery of the Rank and Geometric selectors.
+
+    Subclasses provide `self.fitnesses`, the cumulative fitnesses of the
+    survivors, and `self.sum`, the last of them. A survivor is selected
+    by drawing a target below the sum and binary searching for the first
+    cumulative fitness above it.
+
+    Selections are generated NUM_SELECTIONS at a time to reduce
+    computation time within the algorithm. When they run out, a fresh
+    buffer is drawn from `rng`, so the same stream of selections is
+    never repeated across generations or runs.
+    """
+    def __init__(self, rng):
+        self.rng = rng
+        self.refill()
+
+    def select(self):
+        """Selects a survivor and returns its index."""
+        return bisect_right(self.fitnesses, self.rng.random() * self.sum)
+
+    def refill(self):
+        """Draws a new buffer of NUM_SELECTIONS selections."""
+        random = self.rng.random
+        fitnesses, total = self.fitnesses, self.sum
+        self.selections = [bisect_right(fitnesses, random() * total)
+                           for _ in xrange(NUM_SELECTIONS)]
+        self.index = -1
+
+    def __call__(self):
+        """There is a clear behavior for this class."""
+        self.index += 1
+        if self.index == NUM_SELECTIONS:
+            self.refill()
+            self.index = 0
+        return self.selections[self.index]
+
+    def parents(self, population):
+        """Returns the next NUM_REPLACEMENTS selections, sliced from the
+        buffer rather than taken one call at a time.
+        """
+        parents = []
+        while len(parents) < NUM_REPLACEMENTS:
+            if self.index + 1 == NUM_SELECTIONS:
+                self.refill()
+            start = self.index + 1
+            stop = min(start + NUM_REPLACEMENTS - len(parents), NUM_SELECTIONS)
+            parents += self.selections[start:stop]
+            self.index = stop - 1
+        return parents
+
+
+class Rank(Selector):
     """A selector for restricted rank selection.
-    
+
     Only the best NUM_SURVIVORS cubes can be selected from, and the
     fitness of the best cube is NUM_SURVIVORS, the fitness of the
     second-best cube NUM_SURVIVORS - 1, etc., and the fitness of the
     last survivor is 1.
-    
+
     The restriction allows for controlled progression among phases. All
     cubes in a population need to have met a phase's requirements before
     proceeding to the next phase, so restriction is necessary otherwise
@@ -32,41 +119,17 @@ class Rank:
     For some intuition, the probability of selecting the best among 10
     is 10/55, then the next is 9/55, etc., and the last is 1/55.
 
-    The selector generates NUM_SELECTIONS random indices before the
-    algorithm starts to reduce computation time within the algorithm.
+    The indices are drawn from `rng`, so a seeded RNG gives reproducible
+    selections.
     """
-    def __init__(self):
-        
-        # Calculate fitnesses
-        self.fitnesses = [NUM_SURVIVORS - rank for rank in range(NUM_SURVIVORS)]
-
-        # Cumulative fitnesses
-        for i in range(1, NUM_SURVIVORS):
-            self.fitnesses[i] += self.fitnesses[i - 1]
-        self.sum = self.fitnesses[i - 1]
+    def __init__(self, rng=DEFAULT):
+        self.fitnesses, self.sum = rank_fitnesses()
 
         # Compile NUM_SELECTIONS selections
-        self.selections = [self.select() for _ in range(NUM_SELECTIONS)]
-
-        # Index
-        self.index = -1
+        Selector.__init__(self, rng)
 
-    def select(self):
-        """Selects a survivor based on rank selection and returns its
-        index.
-        """
-        target = int(random() * self.sum)
-        for i in range(NUM_SURVIVORS):
-            if target < self.fitnesses[i]:
-                return i
-    
-    def __call__(self):
-        """There is a clear behavior for this class."""
-        self.index = (self.index + 1) % NUM_SELECTIONS
-        return self.selections[self.index]
-    
 
-class Geometric:
+class Geometric(Selector):
     """A similar selector except probability is distributed more evenly.
     The generation of values was derived from mathematical properties of
     geometric series. The complicated math had to be used, otherwise
@@ -80,29 +143,71 @@ class Geometric:
 
     The structure of this class is similar to that of the Rank class.
     """
-    def __init__(self):
-        
-        # Calculate cumulative fitnesses
-        ratio = (NUM_SURVIVORS - 1.) / NUM_SURVIVORS
-        prob = (1. / NUM_SURVIVORS) / (1 - ratio ** NUM_SURVIVORS)
-        self.fitnesses = [None] * NUM_SURVIVORS
-        self.fitnesses[0] = prob
-        self.fitnesses[NUM_SURVIVORS - 1] = 1
-        for i in range(1, NUM_SURVIVORS - 1):
-            prob *= ratio
-            self.fitnesses[i] = self.fitnesses[i - 1] + prob
-
-        # Same as above
-        self.selections = [self.select() for _ in range(NUM_SELECTIONS)]
-        self.index = -1
+    def __init__(self, rng=DEFAULT):
+        self.fitnesses, self.sum = geometric_fitnesses()
+        Selector.__init__(self, rng)
+
+
+class Tournament:
+    """Restricted tournament selection. Each parent is the winner of a
+    tournament among TOURNAMENT_SIZE survivors drawn uniformly at random,
+    and the winner is the one with the best (lowest) fitness score.
+
+    The population is sorted by fitness score before selection, so the
+    winner is simply the lowest drawn index. All draws for a generation
+    are made at once and the winners are found with a single map of min
+    over the draws.
+    """
+    def __init__(self, rng=DEFAULT, size=TOURNAMENT_SIZE):
+        self.rng = rng
+        self.size = size
+
+    def parents(self, population):
+        random = self.rng.random
+        draws = [int(random() * NUM_SURVIVORS)
+                 for _ in xrange(NUM_REPLACEMENTS * self.size)]
+        if self.size == 1:
+            return draws
+        return map(min, *[draws[i::self.size] for i in range(self.size)])
 
-    def select(self):
-        # Since probabilities are from 0 to 1, no need for a sum
-        target = random()
-        for i in range(NUM_SURVIVORS):
-            if target < self.fitnesses[i]:
-                return i
-    
     def __call__(self):
-        self.index = (self.index + 1) % NUM_SELECTIONS
-        return self.selections[self.index]
+        """Selects a single parent."""
+        random = self.rng.random
+        return min(int(random() * NUM_SURVIVORS) for _ in range(self.size))
+
+
+class Universal:
+    """Stochastic universal sampling over the geometric distribution.
+
+    Rather than drawing a target for every parent, a single random
+    offset places NUM_REPLACEMENTS evenly spaced pointers along the
+    cumulative fitnesses, and one pass over the survivors collects them
+    all. Each survivor then gets within one of its expected number of
+    copies, which removes the sampling noise of repeated draws.
+    """
+    def __init__(self, rng=DEFAULT, fitnesses=geometric_fitnesses):
+        self.rng = rng
+        self.fitnesses, self.sum = fitnesses()
+
+    def parents(self, population):
+        step = float(self.sum) / NUM_REPLACEMENTS
+        pointer = self.rng.random() * step
+        parents = [None] * NUM_REPLACEMENTS
+        survivor = 0
+        for i in xrange(NUM_REPLACEMENTS):
+            while (self.fitnesses[survivor] <= pointer and
+                   survivor < NUM_SURVIVORS - 1):
+                survivor += 1
+            parents[i] = survivor
+            pointer += step
+        return parents
+
+    def __call__(self):
+        """Selects a single parent, which is plain roulette selection."""
+        return min(bisect_right(self.fitnesses, self.rng.random() * self.sum),
+                   NUM_SURVIVORS - 1)
+
+
+"""Selectors by name, for command line tools."""
+SELECTORS = {'rank': Rank, 'geometric': Geometric, 'tournament': Tournament,
+             'universal': Universal}
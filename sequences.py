@@ -0,0 +1,119 @@
+"""Tables of shortest move sequences, one for each move set in
+MOVE_CHOICES.
+
+A table maps the state reached by applying a sequence to state.IDENTITY
+to the shortest sequence reaching it. Sequences that reach the same
+state are equivalent on every cube, so one table serves both solution
+shortening (optimize.py) and any search wanting short phase-legal
+sequences.
+
+Tables are generated by breadth-first search over canonical sequences:
+no two successive moves of the same face, and moves of opposite faces,
+which commute, only in one order. States and sequences are packed into
+byte strings, which keeps the tables small in memory and on disk.
+
+Generate the index: python sequences.py [--depth N] [--out FILE]
+
+Without an index on disk, the table a caller needs is generated in
+memory on first use, at depth SHORTEN_DEPTH.
+
+Jason Mahr
+"""
+
+
+from argparse import ArgumentParser
+from constants import MOVE_CHOICES, SEQUENCES_FILE, SHORTEN_DEPTH
+from marshal import dumps, loads
+import os
+from state import IDENTITY, MOVERS
+from zlib import compress, decompress
+
+
+"""Loaded or generated tables, by move set."""
+TABLES = {}
+
+
+def pack(state):
+    """Returns a state or a sequence of move ids as a byte string."""
+    return str(bytearray(state))
+
+
+def unpack(packed):
+    """Returns the list of integers packed in a byte string."""
+    return list(bytearray(packed))
+
+
+def build_table(moves, depth):
+    """Returns the table of every state within `depth` canonical moves
+    from IDENTITY, using only `moves`. The search stops early if the
+    move set runs out of new states.
+    """
+    table = {pack(IDENTITY): ''}
+    frontier = [(IDENTITY, '', -1)]
+    for _ in range(depth):
+        next_frontier = []
+        for state, sequence, face in frontier:
+            for move in moves:
+
+                # Faces are L, R, F, B, U, D, so face ^ 1 is the opposite
+                if move // 3 == face or (move // 3 == face ^ 1 and
+                                         move // 3 < face):
+                    continue
+                child = MOVERS[move](state)
+                key = pack(child)
+                if key not in table:
+                    table[key] = sequence + chr(move)
+                    next_frontier.append((child, table[key], move // 3))
+        frontier = next_frontier
+    return table
+
+
+def generate(depth):
+    """Returns the tables for every distinct move set in MOVE_CHOICES."""
+    tables = {}
+    for moves in MOVE_CHOICES:
+        if moves not in tables:
+            tables[moves] = build_table(moves, depth)
+    return tables
+
+
+def save(tables, path=SEQUENCES_FILE):
+    with open(path, 'wb') as index:
+        index.write(compress(dumps(tables)))
+
+
+def load(path=SEQUENCES_FILE):
+    """Returns the tables stored at `path`, or an empty dictionary if
+    there is no index there.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'rb') as index:
+        return loads(decompress(index.read()))
+
+
+def get_table(moves):
+    """Returns the table for a move set from the index on disk if it has
+    one, or generates it otherwise. Either way, it is kept for later.
+    """
+    if not TABLES:
+        TABLES.update(load())
+    if moves not in TABLES:
+        TABLES[moves] = build_table(moves, SHORTEN_DEPTH)
+    return TABLES[moves]
+
+
+def main():
+    parser = ArgumentParser(description='Generate shortest move sequences.')
+    parser.add_argument('--depth', type=int, default=SHORTEN_DEPTH)
+    parser.add_argument('--out', default=SEQUENCES_FILE)
+    args = parser.parse_args()
+
+    tables = generate(args.depth)
+    for phase, moves in enumerate(MOVE_CHOICES):
+        print 'Phase {}: {} states'.format(phase + 1, len(tables[moves]))
+    save(tables, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""Headless solver service with a local HTTP/JSON API.
+
+Run: python server.py [--port P] [--workers W]
+
+The server only listens on localhost. Cubes are queued to a pool of W
+solver processes.
+
+    POST /solve      {"cube": [[...], ...]} or {"scramble": "L U2 ..."}
+                     optional: "selector", "seed", "deadline"
+                     -> 202 {"id": 0}
+    GET  /jobs/<id>  -> {"status": "queued" | "solving" | "done" | "failed",
+                         "generations", "phase" | "completed", "fitness",
+                         "time", ...}
+    GET  /cache      -> {"hits", "misses", "size"}
+
+"cube" is a sticker array as returned by Cube.get_cube. While a job is
+solving, its progress has the same fields the GUI's mailbox shows, with
+"phase" the phase being worked on, counting from 1. A finished job has
+"completed", the number of phases its solution completes, instead, and
+also its solution and its solver time. Finished jobs are forgotten
+JOB_TTL seconds later.
+
+Complete solutions are kept in the solution cache (see cache.py). A cube
+found there is done as soon as it is submitted, with "cached" set.
+
+Jason Mahr
+"""
+
+
+from algorithm import solve
+from argparse import ArgumentParser
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from cache import Cache
+from corpus import parse, scrambled
+from constants import JOB_TTL, NUM_PHASES
+from cube import Cube
+from history import format_moves
+from itertools import count
+from json import dumps, loads
+from multiprocessing import Manager, Pool
+from progress import Throttle
+from selectors import SELECTORS
+from SocketServer import ThreadingMixIn
+from streams import stream
+from threading import Lock
+from time import time as now
+from validate import diagnose, is_solved
+
+
+HOST = '127.0.0.1'
+
+
+def cube_from(request):
+    """Returns the cube described by a decoded request body. Raises
+    ValueError if the request does not describe a valid, unsolved cube.
+    """
+    if 'scramble' in request:
+        if not isinstance(request['scramble'], basestring):
+            raise ValueError('scramble must be a string of moves')
+        cube = scrambled(parse(request['scramble']))
+    elif 'cube' in request:
+        stickers = request['cube']
+        if (not isinstance(stickers, list) or len(stickers) != 6 or
+            any(not isinstance(side, list) or len(side) != 8 or
+                any(color not in range(6) for color in side)
+                for side in stickers)):
+            raise ValueError('cube must be 6 lists of 8 colors from 0 to 5')
+        cube = Cube()
+        cube.set_cube(stickers)
+    else:
+        raise ValueError('request needs a cube or a scramble')
+    validation = diagnose(cube.get_cube())
+    if not validation:
+        raise ValueError('cube is not solvable: ' + validation.detail)
+    if is_solved(cube):
+        raise ValueError('cube is already solved')
+    return cube
+
+
+def options_from(request):
+    """Returns the selector name, seed and deadline of a decoded request
+    body. Raises ValueError if any of them is not usable.
+    """
+    name = request.get('selector', 'geometric')
+    if not isinstance(name, basestring) or name not in SELECTORS:
+        raise ValueError('unknown selector {!r}'.format(name))
+    seed = request.get('seed')
+    if seed is not None and (isinstance(seed, bool) or
+                             not isinstance(seed, (int, long))):
+        raise ValueError('seed must be an integer')
+    deadline = request.get('deadline')
+    if deadline is not None and (isinstance(deadline, bool) or
+                                 not isinstance(deadline, (int, long, float))
+                                 or deadline <= 0):
+        raise ValueError('deadline must be a positive number of seconds')
+    return name, seed, deadline
+
+
+def run_job(job_id, stickers, name, seed, deadline, jobs):
+    """Solves one job inside a worker process, reporting progress to the
+    shared `jobs` dictionary. Progress is throttled, since every update
+    is a round trip to the manager process.
+    """
+    cube = Cube()
+    cube.set_cube(stickers)
+    selector = SELECTORS[name](stream(seed, 0))
+    rng = stream(seed, 1)
+
+    def report(event):
+        jobs[job_id] = {'status': 'solving', 'generations': event.generation,
+                        'phase': event.phase, 'fitness': event.fitness,
+                        'time': event.elapsed, 'skipped': event.skipped}
+
+    try:
+        time, generations, solution, phase, fitness = solve(
+            cube, selector, Throttle(report), deadline, rng)
+    except Exception as error:
+        jobs[job_id] = {'status': 'failed', 'error': str(error)}
+        return
+    if phase == NUM_PHASES:
+        cache = Cache()
+        cache.put(cube, solution)
+        cache.close()
+    jobs[job_id] = {'status': 'done', 'generations': generations,
+                    'completed': phase, 'fitness': fitness, 'time': time,
+                    'solution': format_moves(solution),
+                    'length': len(solution), 'solved': phase == NUM_PHASES}
+
+
+class Service:
+    """The job table, the pool of solver processes and the cache."""
+    def __init__(self, workers):
+        self.manager = Manager()
+        self.jobs = self.manager.dict()
+        self.pool = Pool(workers)
+        self.cache = Cache()
+        self.ids = count()
+        self.lock = Lock()
+
+        # When each job was first seen finished, for expiring it
+        self.finished = {}
+
+    def expire(self):
+        """Forgets jobs that were seen finished over JOB_TTL seconds ago.
+        Must be called with the lock held.
+        """
+        current = now()
+        for job_id, job in self.jobs.items():
+            if job['status'] in ('done', 'failed'):
+                if current - self.finished.setdefault(job_id,
+                                                      current) >= JOB_TTL:
+                    del self.jobs[job_id]
+                    del self.finished[job_id]
+
+    def submit(self, request):
+        cube = cube_from(request)
+        name, seed, deadline = options_from(request)
+        with self.lock:
+            self.expire()
+            job_id = next(self.ids)
+            solution = self.cache.get(cube)
+        if solution is not None:
+            self.jobs[job_id] = {'status': 'done', 'generations': 0,
+                                 'completed': NUM_PHASES, 'fitness': 0,
+                                 'time': 0, 'cached': True,
+                                 'solution': format_moves(solution),
+                                 'length': len(solution), 'solved': True}
+            return job_id
+        self.jobs[job_id] = {'status': 'queued'}
+        self.pool.apply_async(run_job, (job_id, cube.get_cube(), name, seed,
+                                        deadline, self.jobs))
+        return job_id
+
+    def status(self, job_id):
+        with self.lock:
+            self.expire()
+        return self.jobs.get(job_id)
+
+    def cache_stats(self):
+        with self.lock:
+            return self.cache.stats()
+
+    def close(self):
+        self.pool.terminate()
+        self.manager.shutdown()
+        self.cache.close()
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Routes requests to the service attached to the server."""
+
+    def reply(self, code, body):
+        data = dumps(body, sort_keys=True)
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path != '/solve':
+            return self.reply(404, {'error': 'not found'})
+        try:
+            length = int(self.headers.getheader('Content-Length') or 0)
+            request = loads(self.rfile.read(length))
+            if not isinstance(request, dict):
+                raise ValueError('request must be a JSON object')
+            job_id = self.server.service.submit(request)
+        except ValueError as error:
+            return self.reply(400, {'error': str(error)})
+        self.reply(202, {'id': job_id})
+
+    def do_GET(self):
+        if self.path == '/cache':
+            return self.reply(200, self.server.service.cache_stats())
+        prefix = '/jobs/'
+        status = None
+        if self.path.startswith(prefix) and self.path[len(prefix):].isdigit():
+            status = self.server.service.status(int(self.path[len(prefix):]))
+        if status is None:
+            return self.reply(404, {'error': 'not found'})
+        self.reply(200, status)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    """An HTTP server on localhost that owns a Service."""
+    daemon_threads = True
+
+    def __init__(self, port, workers):
+        HTTPServer.__init__(self, (HOST, port), Handler)
+        self.service = Service(workers)
+
+    def server_close(self):
+        HTTPServer.server_close(self)
+        self.service.close()
+
+
+def main():
+    parser = ArgumentParser(description='Serve solves on localhost.')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    server = Server(args.port, args.workers)
+    print 'Serving on http://{}:{}'.format(HOST, server.server_address[1])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Cube states as flat tuples, for table-driven searches.
+
+A state is a tuple of the 48 tiles in the order of Cube.get_cube: side
+by side, index by index. Tuples are hashable, so states can key tables,
+and a move is applied by a single permutation of the tuple, which is
+much faster than Cube.move.
+
+The permutations are not written out by hand. They are read off a Cube
+whose tiles are labeled 0 through 47: after a move, the label at each
+position is the position the tile came from.
+
+Jason Mahr
+"""
+
+
+from cube import Cube
+from operator import itemgetter
+
+
+def flatten(cube):
+    """Returns the state of a Cube."""
+    return tuple([tile for side in cube.get_cube() for tile in side])
+
+
+def unflatten(state):
+    """Returns the sticker array (as from Cube.get_cube) of a state."""
+    return [list(state[8 * side:8 * side + 8]) for side in range(6)]
+
+
+def permutations():
+    """Returns the permutation of each of the 18 moves."""
+    perms = [None] * 18
+    for move in range(18):
+        cube = Cube()
+        cube.set_cube(unflatten(range(48)))
+        cube.move(move)
+        perms[move] = flatten(cube)
+    return perms
+
+
+"""`IDENTITY` labels every tile with its own position, so the state of
+a move sequence applied to it identifies the sequence's permutation.
+`SOLVED` is the solved cube.
+"""
+PERMS = permutations()
+MOVERS = [itemgetter(*perm) for perm in PERMS]
+IDENTITY = tuple(range(48))
+SOLVED = flatten(Cube())
+
+
+def apply(state, move):
+    """Returns the state after a move."""
+    return MOVERS[move](state)
+
+
+def apply_all(state, moves):
+    """Returns the state after a sequence of moves."""
+    for move in moves:
+        state = MOVERS[move](state)
+    return state
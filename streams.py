@@ -0,0 +1,115 @@
+"""Random number streams for the solver.
+
+Every component that needs randomness (mutation, scrambling, selection)
+accepts an RNG object, so that a run can be reproduced from its seed and
+parallel workers can draw from independent streams.
+
+Jason Mahr
+"""
+
+
+from constants import (MACRO_RATE, MAX_NUM_MOVES, MOVE_CHOICES, NUM_MUTATIONS,
+                       NUM_PHASES)
+from random import Random
+
+
+"""Shared stream used when no RNG is given. This preserves the old
+behavior of drawing from one unseeded, process-wide generator.
+"""
+DEFAULT = Random()
+
+
+def make_rng(seed=None):
+    """Returns a new stream. The same seed always gives the same stream.
+    """
+    return Random(seed)
+
+
+def stream(seed, worker):
+    """Returns stream number `worker` of the given seed.
+
+    The stream starts from the seeded state and is then moved far away
+    from it by jumpahead, with a different jump for each worker.
+    """
+    rng = Random(seed)
+    rng.jumpahead(worker)
+    return rng
+
+
+def split(seed, workers):
+    """Returns `workers` independent streams derived from one seed.
+    Worker `i` always gets the same stream for the same seed, regardless
+    of how many workers there are.
+    """
+    return [stream(seed, worker) for worker in range(workers)]
+
+
+class Mutations:
+    """Pre-generated random mutations, one buffer per phase.
+
+    A mutation is a random number of random moves from the phase's move
+    choices. Rather than drawing these one at a time inside the
+    algorithm, NUM_MUTATIONS move counts and the moves to go with them
+    are generated in one block. Each call serves the next mutation from
+    the block as a list of move ids.
+
+    Unlike the selectors, which cycle through their selections, a block
+    is only used once. When it runs out, a fresh block is drawn from
+    `rng`, so the same sequence of mutations never repeats.
+
+    Given a macros.Library, each mutation is instead one of the phase's
+    macros with probability MACRO_RATE. Without one, or while a phase has
+    no macros, no extra random numbers are drawn.
+    """
+    def __init__(self, rng=DEFAULT, library=None):
+        self.rng = rng
+        self.library = library
+        self.counts = [[] for _ in range(NUM_PHASES)]
+        self.moves = [[] for _ in range(NUM_PHASES)]
+        self.index = [0] * NUM_PHASES
+        self.position = [0] * NUM_PHASES
+
+    def refill(self, phase):
+        """Draws a new block of mutations for the given phase."""
+        random = self.rng.random
+        limit = MAX_NUM_MOVES[phase] + 1
+        choices = MOVE_CHOICES[phase]
+        num_choices = len(choices)
+        counts = [int(random() * limit) for _ in xrange(NUM_MUTATIONS)]
+        moves = [choices[int(random() * num_choices)]
+                 for _ in xrange(sum(counts))]
+        macros = self.library.get(phase) if self.library else None
+        if macros:
+            counts, moves = self.insert_macros(counts, moves, macros)
+        self.counts[phase] = counts
+        self.moves[phase] = moves
+        self.index[phase] = 0
+        self.position[phase] = 0
+
+    def insert_macros(self, counts, moves, macros):
+        """Returns the block with some mutations replaced by macros."""
+        random = self.rng.random
+        num_macros = len(macros)
+        new_counts, new_moves, position = [], [], 0
+        for count in counts:
+            if random() < MACRO_RATE:
+                macro = macros[int(random() * num_macros)]
+                new_counts.append(len(macro))
+                new_moves.extend(macro)
+            else:
+                new_counts.append(count)
+                new_moves.extend(moves[position:position + count])
+            position += count
+        return new_counts, new_moves
+
+    def __call__(self, phase):
+        """Returns the moves of the next mutation for the given phase."""
+        index = self.index[phase]
+        if index == len(self.counts[phase]):
+            self.refill(phase)
+            index = 0
+        start = self.position[phase]
+        stop = start + self.counts[phase][index]
+        self.index[phase] = index + 1
+        self.position[phase] = stop
+        return self.moves[phase][start:stop]
@@ -0,0 +1,108 @@
+"""The 48 symmetries of the cube, for folding symmetric states together.
+
+A symmetry is a rotation or reflection of space that maps the cube onto
+itself. Applied to a cube state (see state.py), it moves every tile to
+the image of its position and recolors it with the side its color's
+center was moved to, so the solved cube stays solved. Symmetric states
+are solved by symmetric move sequences: a symmetry sends a turn of a
+side to a turn of the image side, in the opposite direction if it is a
+reflection. So a solution found for one state serves all 48.
+
+Nothing here is written out by hand. Tiles get coordinates from
+FACE_AXES and TILE_OFFSETS, and the symmetries are the 48 ways to
+permute and negate the coordinate axes.
+
+Each Thistlethwaite phase only allows the moves in MOVE_CHOICES, so the
+symmetries usable within a phase are those mapping its move set onto
+itself: all 48 in phases 1 and 5, and the 16 that keep one axis in
+place in the others. canonical picks one state of each class under
+those symmetries, so a table or cache keyed by it holds every state of
+the class in one entry.
+
+Jason Mahr
+"""
+
+
+from constants import FACE_AXES, MOVE_CHOICES, TILE_OFFSETS
+from itertools import permutations, product
+from operator import itemgetter
+
+
+def position(side, index):
+    """Returns the coordinates of a tile, with cubies 2 units wide."""
+    normal, right, down = FACE_AXES[side]
+    column, row = TILE_OFFSETS[index]
+    return tuple([3 * n + 2 * (column * r + row * d)
+                  for n, r, d in zip(normal, right, down)])
+
+
+POSITIONS = [position(side, index) for side in range(6) for index in range(8)]
+NORMALS = [normal for normal, right, down in FACE_AXES]
+
+
+def image(symmetry, point):
+    """Returns the image of a point. A symmetry is a pair of tuples,
+    `axes` and `signs`: coordinate i of the image is coordinate axes[i]
+    of the point, times signs[i].
+    """
+    axes, signs = symmetry
+    return tuple([signs[i] * point[axes[i]] for i in range(3)])
+
+
+def is_reflection(symmetry):
+    axes, signs = symmetry
+    swaps = sum(axes[i] > axes[j] for i in range(3) for j in range(i + 1, 3))
+    return (-1) ** swaps * signs[0] * signs[1] * signs[2] < 0
+
+
+"""The symmetries, the identity first. For each: `SOURCES` lists the
+position each tile comes from, `COLORS` maps each color (a side) to its
+image, `MOVE_MAPS` maps each move id to its image, and `INVERSES` gives
+the index of the inverse.
+"""
+SYMMETRIES = list(product(permutations(range(3)), product((1, -1), repeat=3)))
+SOURCES, COLORS, MOVE_MAPS = [], [], []
+for symmetry in SYMMETRIES:
+    locations = dict((image(symmetry, point), i)
+                     for i, point in enumerate(POSITIONS))
+    SOURCES.append(tuple([locations[point] for point in POSITIONS]))
+    colors = [NORMALS.index(image(symmetry, normal)) for normal in NORMALS]
+    COLORS.append(tuple(colors))
+    flip = is_reflection(symmetry)
+    MOVE_MAPS.append(tuple([3 * colors[move // 3] +
+                            (2 - move % 3 if flip else move % 3)
+                            for move in range(18)]))
+INVERSES = [SOURCES.index(tuple([sources.index(i) for i in range(48)]))
+            for sources in SOURCES]
+GETTERS = [itemgetter(*sources) for sources in SOURCES]
+
+
+"""Indices of the symmetries that map each phase's moves onto itself."""
+PHASE_SYMMETRIES = [[i for i, moves in enumerate(MOVE_MAPS)
+                     if sorted(moves[move] for move in choices) ==
+                     sorted(choices)]
+                    for choices in MOVE_CHOICES]
+
+
+def transform(state, symmetry):
+    """Returns the image of a state under the symmetry with the given
+    index.
+    """
+    colors = COLORS[symmetry]
+    return tuple([colors[color] for color in GETTERS[symmetry](state)])
+
+
+def canonical(state, phase=0):
+    """Returns the least image of a state under the symmetries of the
+    given phase, and the index of the symmetry giving it.
+    """
+    return min((transform(state, symmetry), symmetry)
+               for symmetry in PHASE_SYMMETRIES[phase])
+
+
+def translate(moves, symmetry):
+    """Returns the image of a list of move ids. If the moves solve a
+    state, their image solves its image.
+    """
+    move_map = MOVE_MAPS[symmetry]
+    return [move_map[move] for move in moves]
@@ -5,11 +5,30 @@ Jason Mahr
 """
 
 
+from algorithm import complete_solutions, quiet, settle, solve
+from benchmark import percentile
+from cache import Cache, key
 from constants import *
+from costs import MODELS, CostModel
+from corpus import format_scramble, parse, scrambled, scrambles
 from cube import Cube
+from finisher import search
 from fitness import *
-from history import History
-from validate import is_even, is_solved
+from g3table import index, step
+from history import History, format_moves, pack_moves, unpack_moves
+from macros import Library, segment
+from optimize import shorten
+from progress import Task, Throttle
+from ranking import rank
+from sequences import build_table, pack
+from selectors import SELECTORS, Geometric, Rank
+from server import cube_from, options_from
+import sqlite3
+from state import IDENTITY, SOLVED, apply_all, flatten
+from symmetry import (INVERSES, MOVE_MAPS, PHASE_SYMMETRIES, canonical,
+                      transform, translate)
+from streams import Mutations, make_rng, split
+from validate import check_all, diagnose, inversions, is_even, is_solved
 
 
 ## For history.py
@@ -20,6 +39,20 @@ moves = [1, 5, 1, 9, 9, 8, 8, 12, 14, 15, 17, 12, 2, 3, 6, 5, 7, 7, 9, 10]
 for move in moves:
     h.add(move)
 assert h.get() == ["R'", 'B2', 'F2', 'U', "L'", 'R', 'F', "R'", "B'"]
+assert list(h) == h.ids() == map(MOVES.index, h.get())
+assert list(h.latest()) == h.ids()[::-1]
+assert format_moves(h) == "R' B2 F2 U L' R F R' B'"
+for ids in ([], [17], range(18), [0, 17] * 50):
+    packed = pack_moves(ids)
+    assert len(packed) == 2 + (5 * len(ids) + 7) // 8
+    assert unpack_moves(packed) == ids
+for packed in ('', '\x00', pack_moves(range(18))[:-1], '\x52\x20\x00',
+               pack_moves([0, 18]), pack_moves([31])):
+    try:
+        unpack_moves(packed)
+        assert False
+    except ValueError:
+        pass
 
 
 ## For cube.py
@@ -33,12 +66,253 @@ assert c.get_cube() == [[1, 1, 5, 4, 3, 1, 4, 4], [3, 3, 0, 4, 2, 3, 4, 0],
                         [4, 2, 2, 5, 5, 0, 1, 4], [0, 1, 3, 1, 5, 0, 2, 5]]
 
 
+d = Cube()
+d.set_dirty(False)
+e = Cube()
+e.copy(d)
+assert not e.is_dirty()
+e.move(0)
+assert e.is_dirty()
+
+
 ## For fitness.py
 
 
 assert [fitness[i](c) for i in range(7)] == [20, 90, 250, 49050, 615, 120, 195]
 
 
+## For streams.py
+
+
+a, b = split(7, 2)
+assert a.random() != b.random()
+assert split(7, 3)[1].random() == split(7, 2)[1].random()
+assert make_rng(7).random() == make_rng(7).random()
+m = Mutations(make_rng(7))
+mutations = [m(6) for _ in range(100)]
+assert all(move in G3C_MOVES for moves in mutations for move in moves)
+assert all(len(moves) <= MAX_NUM_MOVES[6] for moves in mutations)
+
+
+## For macros.py
+
+
+assert segment([[0, 3], [0, 4, 6]], [0, 4, 7, 9]) == [7, 9]
+library = Library(path=None)
+assert library.record(6, [0, 13, 16, 13])
+assert library.get(6) == [(13, 16, 13)]
+assert not library.record(6, [13, 0]) and not library.record(0, [])
+assert Library({'6': [[16]]}).get(6) == [(16,)]
+m = Mutations(make_rng(7), library)
+mutations = [m(6) for _ in range(1000)]
+assert all(move in G3C_MOVES for moves in mutations for move in moves)
+assert [13, 16, 13] in mutations
+
+
+## For selectors.py
+
+
+for selector in (Rank(make_rng(7)), Geometric(make_rng(7))):
+    first = selector.selections
+    picks = [selector() for _ in range(NUM_SELECTIONS + 1)]
+    assert picks[:NUM_SELECTIONS] == first
+    assert selector.selections != first
+    assert all(0 <= pick < NUM_SURVIVORS for pick in picks)
+for selector in SELECTORS.values():
+    parents = selector(make_rng(7)).parents(None)
+    assert len(parents) == NUM_REPLACEMENTS
+    assert all(0 <= parent < NUM_SURVIVORS for parent in parents)
+
+
+## For corpus.py and benchmark.py
+
+
+corpus = scrambles(2, 7)
+assert corpus == scrambles(2, 7) and corpus[0] != corpus[1]
+assert scrambled(corpus[0]).get_cube() != Cube().get_cube()
+assert parse(format_scramble(corpus[0])) == corpus[0]
+try:
+    parse("L R X")
+    assert False
+except ValueError:
+    pass
+assert percentile(range(1, 21), 0.5) == 10
+assert percentile(range(1, 21), 0.95) == 19
+
+
+## For progress.py
+
+
+events = []
+throttle = Throttle(events.append, interval=60)
+for generation, phase in ((1, 1), (2, 1), (3, 2), (4, 2)):
+    throttle(generation, phase, 0, 0, 0.5)
+assert [event.generation for event in events] == [1, 3]
+assert events[0].skipped == 0.5
+task = Task(scrambled(corpus[0]), Geometric(make_rng(7)), rng=make_rng(7))
+task.cancel()
+assert task.result()[1] == 1 and task.done()
+
+
+## For algorithm.py
+
+
+class Countdown:
+    """Cancels a solve after a number of generations."""
+    def __init__(self, generations):
+        self.generations = generations
+
+    def is_set(self):
+        self.generations -= 1
+        return self.generations <= 0
+
+
+c = scrambled(corpus[0])
+result = solve(c, Geometric(make_rng(7)), quiet, rng=make_rng(7),
+               cancel=Countdown(4), finish=False)
+for move in result[2]:
+    c.move(move)
+assert result[3:] == settle(c, 0) and result[4]
+population = []
+for moves in ([0], [1, 4], [3, 12], [1, 4], [13]):
+    population.append(Cube())
+    for move in moves:
+        population[-1].move(move)
+solutions = complete_solutions(population, 1, [], False, NUM_PHASES)
+assert [solution[:len(solution) // 2] for solution in solutions] == [[1, 4],
+                                                                     [13]]
+assert all(apply_all(SOLVED, solution) == SOLVED for solution in solutions)
+assert complete_solutions(population, 1, [], False, NUM_PHASES, 0) == []
+
+
+## For server.py
+
+
+request = {'cube': scrambled(corpus[0]).get_cube()}
+assert cube_from(request).get_cube() == request['cube']
+for request in ({}, {'cube': [[0]]}, {'cube': Cube().get_cube()},
+                {'scramble': 'L X'}, {'scramble': 5}):
+    try:
+        cube_from(request)
+        assert False
+    except ValueError:
+        pass
+assert options_from({'seed': 7, 'deadline': 2.5}) == ('geometric', 7, 2.5)
+for request in ({'selector': 'best'}, {'selector': []}, {'seed': '7'},
+                {'seed': True}, {'deadline': '5'}, {'deadline': 0}):
+    try:
+        options_from(request)
+        assert False
+    except ValueError:
+        pass
+
+
+## For state.py and optimize.py
+
+
+c = scrambled(corpus[0])
+assert flatten(c) == apply_all(SOLVED, map(MOVES.index, corpus[0]))
+assert apply_all(IDENTITY, [0, 0, 0, 0]) == IDENTITY
+table = build_table(G0_MOVES, 2)
+assert table[pack(IDENTITY)] == '' and len(table) == 1 + 18 + 243
+assert table[pack(apply_all(IDENTITY, [3, 0]))] == '\x00\x03'
+assert len(build_table(G3C_MOVES, 10)) == 4
+assert (shorten(["L", "R", "L'", "U", "U", "U", "F2"], table) ==
+        ["R", "U'", "F2"])
+assert shorten(["F", "U", "F'", "F", "U'", "F'"], table) == []
+long_solution = ["L", "U", "R'", "F2", "B", "D'"] * 3
+short_solution = shorten(long_solution, table)
+assert len(short_solution) <= len(long_solution)
+assert (apply_all(SOLVED, map(MOVES.index, short_solution)) ==
+        apply_all(SOLVED, map(MOVES.index, long_solution)))
+
+
+## For finisher.py
+
+
+for moves in ([], [13], [1, 7, 13, 4, 16, 10, 1, 7, 13]):
+    state = apply_all(SOLVED, moves)
+    finish = search(state)
+    assert len(finish) <= len(moves) and apply_all(state, finish) == SOLVED
+assert len(search(apply_all(SOLVED, [1, 4]))) == 2
+assert search(apply_all(SOLVED, [0]), depth=6) is None
+
+
+## For g3table.py
+
+
+assert index(SOLVED) == 0 and index(apply_all(SOLVED, [12])) is None
+state = apply_all(SOLVED, [1, 7, 13, 4, 16, 10, 1])
+for move_index, move in enumerate(G3A_MOVES):
+    assert index(apply_all(state, [move])) == step(index(state), move_index)
+
+
+## For symmetry.py
+
+
+assert map(len, PHASE_SYMMETRIES) == [48, 16, 16, 16, 48, 16, 16]
+state = flatten(scrambled(corpus[0]))
+for symmetry in range(48):
+    image = transform(state, symmetry)
+    assert transform(image, INVERSES[symmetry]) == state
+    assert transform(SOLVED, symmetry) == SOLVED
+    for move in range(18):
+        assert (transform(apply_all(state, [move]), symmetry) ==
+                apply_all(image, [MOVE_MAPS[symmetry][move]]))
+assert canonical(transform(state, 5))[0] == canonical(state)[0]
+
+
+## For cache.py
+
+
+cache = Cache(':memory:', capacity=2)
+cubes = map(scrambled, corpus + [["L"]])
+assert cache.get(cubes[0]) is None
+cache.put(cubes[0], [0]), cache.put(cubes[1], [3])
+assert cache.get(cubes[0]) == [0]
+cache.put(cubes[2], [6])
+assert cache.get(cubes[1]) is None and cache.get(cubes[0]) == [0]
+assert cache.stats() == {'hits': 2, 'misses': 2, 'size': 2}
+scramble = map(MOVES.index, corpus[1])
+solution = [move - move % 3 + 2 - move % 3 for move in scramble[::-1]]
+cache.put(scrambled(corpus[1]), solution)
+for symmetry in (0, 7, 30):
+    c = scrambled([MOVES[move] for move in translate(scramble, symmetry)])
+    for move in cache.get(c):
+        c.move(move)
+    assert is_solved(c)
+for packed in ('\x52\x20', pack_moves([0, 25])):
+    cache.put(cubes[0], [0])
+    cache.db.execute('UPDATE solutions SET solution = ? WHERE key = ?',
+                     (sqlite3.Binary(packed), key(cubes[0])[0]))
+    assert cache.get(cubes[0]) is None
+    assert cache.stats()['size'] == 1
+
+
+## For costs.py
+
+
+assert MODELS['turns'].cost([0, 4, 14]) == 4
+assert MODELS['moves'].cost([0, 4, 14]) == 3
+assert CostModel(regrip=10).cost([0, 4, 14]) == 1 + 2 + 11
+h = History()
+for move in [0, 4, 14, 12, 12, 7]:
+    h.add(move)
+assert h.size(MODELS['moves'].table) == h.size() == 4
+assert h.size(CostModel(regrip=10).table) == 1 + 2 + 11 + 12
+for model in MODELS.values():
+    assert abs(sum(map(sum, model.scores[:18])) - 18 * 18) < 1e-9
+assert MODELS['moves'].scores == MODELS['moves'].table
+
+
+## For ranking.py
+
+
+solutions = [[1, 13], [0, 12, 6], [1]]
+assert rank(solutions) == [[1], [1, 13], [0, 12, 6]]
+assert rank(solutions, 'cost') == [[1], [0, 12, 6], [1, 13]]
+
+
 ## For validation.py
 
 
@@ -49,6 +323,24 @@ y = ([2, 3, 0, 1], True)
 z = ([2, 3, 4, 1, 0], False)
 for permutation, even in (v, w, x, y, z):
     assert is_even(permutation) == even
+    assert (inversions(permutation) % 2 == 0) == even
+
+
+states = [Cube().get_cube() for _ in range(5)]
+states[1][L][3] = F
+states[2][L][3], states[2][F][7] = F, L
+states[3][U][2], states[3][B][0], states[3][R][2] = B, R, U
+states[4][L][3], states[4][L][7] = states[4][L][7], states[4][L][3]
+states[4][F][7], states[4][B][3] = states[4][B][3], states[4][F][7]
+assert check_all(states) == [(True, VALID), (False, BAD_COLOR),
+                             (False, EDGE_FLIP), (False, CORNER_TWIST),
+                             (False, PERMUTATION_PARITY)]
+assert diagnose(states[0])
+assert diagnose(states[2]).pieces == ('L3/F7',)
+assert diagnose(states[3]).pieces == ('U2/B0/R2',)
+assert 'twist sum is 2' in diagnose(states[3]).detail
+states[0][U][7] = F
+assert diagnose(states[0]).pieces == ('L3/F7', 'U7/L1')
 
 
 ## For the public. Paste scramble and solution here.
@@ -60,3 +352,5 @@ c.reset()
 for move in scramble + solution:
     c.move(MOVES.index(move))
 assert is_solved(c)
+c.move(0)
+assert not is_solved(c) and not c.matches(Cube().get_cube())
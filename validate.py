@@ -7,11 +7,15 @@ Jason Mahr
 
 
 from constants import *
-from fitness import edge_flipped_correctly, miscolored_tiles
+from fitness import edge_flipped_correctly
+
+
+"""The signature of the solved state, in the format of Cube.get_cube."""
+SOLVED = [[side] * 8 for side in range(6)]
 
 
 def is_solved(cube):
-    return not miscolored_tiles(cube)
+    return cube.matches(SOLVED)
 
 
 def is_even(permutation):
@@ -52,16 +56,107 @@ def is_even(permutation):
     return is_even
 
 
-def not_color(color):
-    """Checks if an integer is a valid color. Quite superfluous due to
-    the hard invariant in the code that maintains color validity, but
-    just to be safe.
+def inversions(permutation):
+    """Returns the number of inversions of a permutation, which is even
+    exactly when the permutation is even. Unlike is_even, this assumes a
+    proper permutation and allocates nothing, which suits the short
+    permutations of validation.
     """
-    return not 0 <= color <= 5
-    
+    n = len(permutation)
+    count = 0
+    for i in xrange(n):
+        p = permutation[i]
+        for j in xrange(i + 1, n):
+            count += p > permutation[j]
+    return count
+
+
+"""Lookup tables for validation. See `diagnose` for the full
+explanation.
+
+`EDGE_POS` and `CORNER_POS` list the positions of the 12 edges and 8
+corners. `EDGE_LOOKUP` maps the colors of an edge, in the order of its
+position, to the index of that edge in `EDGE_COLORS` and whether the
+edge is misflipped. `CORNER_LOOKUP` maps the colors of a corner to the
+index of that corner in `CORNER_COLORS` and its twist. Color
+combinations that no piece has are absent from both.
+"""
+EDGE_POS = ((L3, F7), (U7, L1), (L7, B3), (D7, L5), (R7, F3), (U3, R1),
+            (R3, B7), (D3, R5), (U5, F1), (D1, F5), (U1, B1), (D5, B5))
+EDGE_COLORS = (8, 27, 64, 125, 9, 28, 65, 126, 72, 133, 91, 152)
+EDGE_LOOKUP = dict(((edge_0, edge_1),
+                    (EDGE_COLORS.index(edge_0 ** 3 + edge_1 ** 3),
+                     not edge_flipped_correctly(edge_0, edge_1)))
+                   for edge_0 in range(6) for edge_1 in range(6)
+                   if edge_0 // 2 != edge_1 // 2)
+CORNER_POS = ((U2, B0, R2), (U6, F0, L2), (D2, F4, R6), (D6, B4, L6),
+              (U0, L0, B2), (U4, R0, F2), (D0, L4, F6), (D4, R4, B6))
+CORNER_COLORS = ((U, B, R), (U, F, L), (D, F, R), (D, B, L),
+                 (U, L, B), (U, R, F), (D, L, F), (D, R, B))
+CORNER_LOOKUP = {}
+for corner_index, (ud, second, third) in enumerate(CORNER_COLORS):
+    CORNER_LOOKUP[(ud, second, third)] = (corner_index, 0)
+    CORNER_LOOKUP[(third, ud, second)] = (corner_index, 1)
+    CORNER_LOOKUP[(second, third, ud)] = (corner_index, 2)
+
+
+def tile_name((side, index)):
+    """Names a tile the way constants.py does, e.g. (U, 7) -> 'U7'."""
+    return 'LRFBUD'[side] + str(index)
+
+
+def piece_name(position):
+    """Names a piece by its tiles, e.g. ((U, 7), (L, 1)) -> 'U7/L1'."""
+    return '/'.join(map(tile_name, position))
+
+
+class Validation:
+    """The result of validating a cube. It is true only for a solvable
+    cube. Otherwise, `reason` names the failing check (see `check`),
+    `pieces` names the offending pieces, and `detail` describes the
+    problem for the user.
+    """
+    def __init__(self, reason=VALID, pieces=(), detail=''):
+        self.reason = reason
+        self.pieces = pieces
+        self.detail = detail
+
+    def __nonzero__(self):
+        return self.reason == VALID
+
+    def __repr__(self):
+        return 'Validation({!r}, {!r}, {!r})'.format(self.reason,
+                                                     self.pieces, self.detail)
+
 
 def is_valid(cube):
-    """Checks that a cube is solvable.
+    """Checks that a cube is solvable."""
+    return check(cube.get_cube()) == VALID
+
+
+def check_all(states):
+    """Validates many sticker arrays (as from Cube.get_cube), returning
+    a (validity, reason) pair for each, in order.
+    """
+    results = [None] * len(states)
+    for i, state in enumerate(states):
+        reason = check(state)
+        results[i] = (reason == VALID, reason)
+    return results
+
+
+def check(state):
+    """Checks that a sticker array, as from Cube.get_cube, is solvable.
+    Returns VALID, or the reason it is not: BAD_COLOR, EDGE_FLIP,
+    CORNER_TWIST or PERMUTATION_PARITY.
+    """
+    return diagnose(state).reason
+
+
+def diagnose(state):
+    """Checks that a sticker array, as from Cube.get_cube, is solvable,
+    and returns a Validation naming the first failing check and the
+    offending pieces, so input can be fixed without validating again.
 
     Citation: Rules from (https://ruwix.com/the-rubiks-cube/
                           unsolvable-rubiks-cube-invalid-scramble/)
@@ -81,6 +176,9 @@ def is_valid(cube):
     have parities of 0, the third requirement is verified, which is that
     the order of pieces on the cube with respect to the start state must
     be an even permutation.
+
+    Pieces are identified through the lookup tables above rather than
+    by searching the color tuples, and all checks happen in one pass.
     """
     
     ## Edges
@@ -98,24 +196,24 @@ def is_valid(cube):
     of cubes is that this eliminates the hassle of checking for both
     (0, 2), and (2, 0) as the same thing.
     
-    `edge_pos` encodes positions (!). `edge_colors` encodes colors in
+    `EDGE_POS` encodes positions (!). `EDGE_COLORS` encodes colors in
     the form of the unique sums of cubes.
 
-    Furthermore, the values corresponding to `edge_colors` is a permutation
-    of the values corresponding to `edge_pos`. This permutation is
+    Furthermore, the values corresponding to `EDGE_COLORS` is a permutation
+    of the values corresponding to `EDGE_POS`. This permutation is
     recorded as edge_permutation. It needs to be such that corner and
     edge permutation together is even, which means either both are even
     or both are odd.
 
     The position of values in `edge_permutation` corresponds to the
-    order of `edge_colors`, while the values correspond to the indices
-    of `edge_pos`. Essentially, if edge_permutation[0] = 1, it means
+    order of `EDGE_COLORS`, while the values correspond to the indices
+    of `EDGE_POS`. Essentially, if edge_permutation[0] = 1, it means
     that for the 0th color combination in `edge_color`, which is the
     left color and the front color, the one edge with these two colors
-    is located at the 1st edge position in `edge_pos`, which is on the
+    is located at the 1st edge position in `EDGE_POS`, which is on the
     left and up edges.
 
-    The order in `edge_pos` is the same as in the first line of this
+    The order in `EDGE_POS` is the same as in the first line of this
     comment. Some edges are flipped with respect to provided in the
     first line of this comment, and this is so that the helper function
     edge_flipped_correctly from `fitness.py` can be reused.
@@ -128,50 +226,44 @@ def is_valid(cube):
     `is_even`, where a bool is flipped every time there is a misflipped
     edge.
     """
-    edge_pos = ((L3, F7), (U7, L1), (L7, B3), (D7, L5), (R7, F3), (U3, R1),
-                (R3, B7), (D3, R5), (U5, F1), (D1, F5), (U1, B1), (D5, B5))
-    edge_colors = (8, 27, 64, 125, 9, 28, 65, 126, 72, 133, 91, 152)
     edge_permutation = [None] * 12
     edge_parity_is_even = True
+    misflipped_edges = []
 
     # Iterate over edge positions
-    for edge_position_index, edge_position in enumerate(edge_pos):
-        
-        # Get the colors
-        edge_0 = cube.get(edge_position[0])
-        edge_1 = cube.get(edge_position[1])
-
-        # Check this edge has colors between 0 and 5
-        if not_color(edge_0) or not_color(edge_1):
-            return False
-
-        # Check the two colors of this edge are not the same or opposite
-        if edge_0 // 2 == edge_1 // 2:
-            return False
-
-        # Sum of cubes uniquely indicates which colors are at position
-        edge_color = edge_0 ** 3 + edge_1 ** 3
+    for edge_position_index, ((s0, i0), (s1, i1)) in enumerate(EDGE_POS):
 
-        """Get index of the `edge_color` within `edge_colors`. Note the
-        color will definitely be in the list if the two values are
-        between 0 and 5 and are not the same when integer-divided by 2.
+        """Identify the edge by its colors. Colors outside 0 to 5, two
+        colors that are the same or opposite, are all absent from the
+        lookup.
         """
-        edge_color_index = edge_colors.index(edge_color)
+        edge = EDGE_LOOKUP.get((state[s0][i0], state[s1][i1]))
+        if edge is None:
+            name = piece_name(EDGE_POS[edge_position_index])
+            return Validation(BAD_COLOR, (name,),
+                              'No edge has the colors at ' + name + '.')
+        edge_color_index, misflipped = edge
 
         # Check another edge position did not already have these colors
         if edge_permutation[edge_color_index] is not None:
-            return False
+            names = (piece_name(EDGE_POS[edge_permutation[edge_color_index]]),
+                     piece_name(EDGE_POS[edge_position_index]))
+            return Validation(BAD_COLOR, names,
+                              'Duplicate edge at {} and {}.'.format(*names))
 
         # Track the index in `edge_permutation`
         edge_permutation[edge_color_index] = edge_position_index
 
         # Flip `edge_parity` if this edge is misflipped
-        if not edge_flipped_correctly(edge_0, edge_1):
+        if misflipped:
             edge_parity_is_even = not edge_parity_is_even
+            misflipped_edges.append(EDGE_POS[edge_position_index])
 
     # Edge parity must be even
     if not edge_parity_is_even:
-        return False
+        names = tuple(map(piece_name, misflipped_edges))
+        return Validation(EDGE_FLIP, names, 'Odd number of flipped edges: '
+                          + ', '.join(names) + '.')
 
     ## Corners
 
@@ -193,7 +285,7 @@ def is_valid(cube):
     piece. LFU and FUL are also invalid. So to save work we don't
     calculate a sum of cubes. Instead we start with UFL, rotating based
     on the location of the UD color (and recording parity) and then
-    checking for existence in corner_colors.
+    checking for existence in CORNER_COLORS.
 
     Notice that the U2, U6, D2, D6 corners have the FB faces second,
     whereas the other four have the LR faces second. This is because
@@ -210,60 +302,54 @@ def is_valid(cube):
     places U on F and turning UFR clockwise places U on R. Finally, if
     UD is on the third face, this increases parity by 2.
 
-    The code records parity optimistically, since if the corner is later
-    deemed invalid, it just returns False. The code then checks whether
-    the corner is valid by seeing if its parity-0 rotation is in
-    corner_colors. This eliminates totally inplausible corners like
-    LLL, and also the sticker-swapped arrangements like ULF, where L is
-    on the second face (FB for UFL orbit; LR for UFR orbit).
+    `CORNER_LOOKUP` holds all three rotations of every corner in
+    CORNER_COLORS with the parity of each, so a single lookup both
+    finds the parity and checks whether the corner is valid. This
+    eliminates totally inplausible corners like LLL, and also the
+    sticker-swapped arrangements like ULF, where L is on the second face
+    (FB for UFL orbit; LR for UFR orbit).
 
     If the corner exists and another corner has not already claimed the
     same colors (cube would be invalid), permutation is recorded similar
     to with edges and is checked together with edges at the end.
     """
-    corner_pos = ((U2, B0, R2), (U6, F0, L2), (D2, F4, R6), (D6, B4, L6),
-                  (U0, L0, B2), (U4, R0, F2), (D0, L4, F6), (D4, R4, B6))
-    corner_colors = ((U, B, R), (U, F, L), (D, F, R), (D, B, L),
-                     (U, L, B), (U, R, F), (D, L, F), (D, R, B))
     corner_permutation = [None] * 8
     corner_parity = 0
+    twisted_corners = []
 
     # Iterate over corner positions
-    for corner_position_index, corner_position in enumerate(corner_pos):
-        
-        # Get colors. corner_#: corner such that if UD there, parity #.
-        corner_0 = cube.get(corner_position[0])
-        corner_1 = cube.get(corner_position[1])
-        corner_2 = cube.get(corner_position[2])
-
-        # Optimistically update parity while getting parity-0 of corner
-        if corner_0 in (U, D):
-            corner = (corner_0, corner_1, corner_2)
-        elif corner_1 in (U, D):
-            corner = (corner_1, corner_2, corner_0)
-            corner_parity += 1
-        elif corner_2 in (U, D):
-            corner = (corner_2, corner_0, corner_1)
-            corner_parity += 2
-        else:
-            return False
-        
-        # Find corner. If does not exist, stickers could be swapped.
-        try:
-            corner_color_index = corner_colors.index(corner)
-        except ValueError:
-            return False
+    for corner_position_index, corner_position in enumerate(CORNER_POS):
+        ((s0, i0), (s1, i1), (s2, i2)) = corner_position
+
+        # Find corner and its parity. If absent, stickers could be swapped.
+        corner = CORNER_LOOKUP.get((state[s0][i0], state[s1][i1],
+                                    state[s2][i2]))
+        if corner is None:
+            name = piece_name(corner_position)
+            return Validation(BAD_COLOR, (name,),
+                              'No corner has the colors at ' + name + '.')
+        corner_color_index, parity = corner
+        corner_parity += parity
+        if parity:
+            twisted_corners.append(corner_position)
 
         # Check another corner position didn't already have these colors
         if corner_permutation[corner_color_index] is not None:
-            return False
+            names = (piece_name(
+                         CORNER_POS[corner_permutation[corner_color_index]]),
+                     piece_name(corner_position))
+            return Validation(BAD_COLOR, names,
+                              'Duplicate corner at {} and {}.'.format(*names))
         
         # Track the index in `corner_permutation`
         corner_permutation[corner_color_index] = corner_position_index
 
     # Corner parity must be 0
     if corner_parity % 3:
-        return False
+        names = tuple(map(piece_name, twisted_corners))
+        return Validation(CORNER_TWIST, names,
+                          'Corner twist sum is {} (mod 3) over {}.'.format(
+                          corner_parity % 3, ', '.join(names)))
 
     ## Permutation
     
@@ -276,6 +362,11 @@ def is_valid(cube):
     swap with an edge piece. This has simplified the function. For the
     overall permutation to be even, either both must be even, or both
     must be odd (Recall from is_even that two odd cycles is an even
-    permutation. By the same logic, so are two odd permutations.) 
+    permutation. By the same logic, so are two odd permutations.) So
+    the total number of inversions of the two must be even.
     """
-    return is_even(corner_permutation) == is_even(edge_permutation)
+    if (inversions(corner_permutation) + inversions(edge_permutation)) % 2:
+        return Validation(PERMUTATION_PARITY, (),
+                          'Edge and corner permutations have different '
+                          'parity, as if two pieces were swapped.')
+    return Validation()